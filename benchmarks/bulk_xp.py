@@ -0,0 +1,105 @@
+"""Compare bulk XP grants: the old per-user SELECT/UPSERT loop vs LevelDatabase.bulk_add_xp.
+
+Run from the repository root:
+
+    python -m benchmarks.bulk_xp [--users 10000] [--existing 0.5]
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+
+import aiosqlite
+
+from cogs.database.db_manager import LevelDatabase
+from cogs.database.schema import init_db
+
+GUILD_ID = "1"
+
+
+async def prepare(path: str, user_ids, existing: float):
+    await init_db(path)
+    async with aiosqlite.connect(path) as db:
+        seeded = [(GUILD_ID, user_id, random.randint(0, 90), random.randint(1, 20))
+                  for user_id in user_ids if random.random() < existing]
+        await db.executemany('INSERT INTO levels (guild_id, user_id, xp, level) VALUES (?, ?, ?, ?)', seeded)
+        await db.commit()
+
+
+async def legacy_bulk_add_xp(path: str, guild_id: str, user_xp_mapping: dict):
+    """The pre-batching implementation, kept here as the baseline."""
+    results = []
+    async with aiosqlite.connect(path) as db:
+        for user_id, xp_amount in user_xp_mapping.items():
+            async with db.execute(
+                'SELECT level, xp FROM levels WHERE guild_id = ? AND user_id = ?',
+                (guild_id, user_id)
+            ) as cursor:
+                result = await cursor.fetchone()
+                current_level = result[0] if result else 1
+                current_xp = result[1] if result else 0
+
+            new_xp = current_xp + xp_amount
+            leveled_up = False
+            while True:
+                xp_needed = int(100 * (current_level ** 1.5))
+                if new_xp >= xp_needed:
+                    new_xp -= xp_needed
+                    current_level += 1
+                    leveled_up = True
+                else:
+                    break
+
+            await db.execute('''
+                INSERT INTO levels (guild_id, user_id, xp, level)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(guild_id, user_id)
+                DO UPDATE SET xp = ?, level = ?
+            ''', (guild_id, user_id, new_xp, current_level, new_xp, current_level))
+            results.append((user_id, leveled_up, current_level))
+        await db.commit()
+    return results
+
+
+async def main(users: int, existing: float, amount: int):
+    random.seed(1234)
+    user_ids = [str(100000000000000000 + i) for i in range(users)]
+    mapping = {user_id: amount for user_id in user_ids}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        before_path = os.path.join(tmp, 'before.db')
+        after_path = os.path.join(tmp, 'after.db')
+        random.seed(1234)
+        await prepare(before_path, user_ids, existing)
+        random.seed(1234)
+        await prepare(after_path, user_ids, existing)
+
+        start = time.perf_counter()
+        before = await legacy_bulk_add_xp(before_path, GUILD_ID, mapping)
+        before_time = time.perf_counter() - start
+
+        db = LevelDatabase(after_path)
+        await db.connect()
+        try:
+            start = time.perf_counter()
+            after = await db.bulk_add_xp(GUILD_ID, mapping)
+            after_time = time.perf_counter() - start
+        finally:
+            await db.close()
+
+    assert before == after, "bulk_add_xp results differ from the legacy implementation"
+    print(f"{users} users, {existing:.0%} with existing rows, {amount} XP each")
+    print(f"  before (per-user SELECT + UPSERT): {before_time * 1000:9.1f} ms")
+    print(f"  after  (batched read + executemany): {after_time * 1000:7.1f} ms")
+    print(f"  speedup: {before_time / after_time:.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--existing", type=float, default=0.5, help="fraction of users that already have a row")
+    parser.add_argument("--amount", type=int, default=250)
+    args = parser.parse_args()
+    asyncio.run(main(args.users, args.existing, args.amount))
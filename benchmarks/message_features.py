@@ -0,0 +1,106 @@
+"""Per-message cost of automod's content checks: the old separate scans vs MessageFeatures.
+
+Run from the repository root:
+
+    python -m benchmarks.message_features [--length 2000] [--number 2000]
+
+Each message shape is measured with every content rule enabled, which
+is the worst case; both implementations must reach the same verdicts.
+Features are measured lazily, so both stop at the first rule that fires.
+"""
+import argparse
+import random
+import re
+import string
+import timeit
+from collections import Counter
+
+from cogs.automod import CONTENT_RULES
+from utils.message_features import MessageFeatures
+
+CUSTOM_EMOJI_REGEX = re.compile(r'<a?:[a-zA-Z0-9_]+:\d+>')
+UNICODE_EMOJI_REGEX = re.compile(r'[\U0001F300-\U0001F9FF\u2600-\u26FF\u2700-\u27BF]')
+
+
+def legacy_check_char_spam(content, threshold):
+    if not content:
+        return False
+    count = 1
+    prev_char = content[0]
+    for char in content[1:]:
+        if char == prev_char:
+            count += 1
+            if count >= threshold:
+                return True
+        else:
+            count = 1
+            prev_char = char
+    return False
+
+
+def legacy_verdict(content, settings={}):
+    """The pre-extraction checks from AutoMod.on_message, kept here as the baseline."""
+    caps_count = sum(1 for c in content if c.isupper())
+    if len(content) > 10 and (caps_count / len(content)) * 100 > settings.get('caps_percentage', 70):
+        return "Excessive Caps"
+    emoji_count = len(CUSTOM_EMOJI_REGEX.findall(content)) + len(UNICODE_EMOJI_REGEX.findall(content))
+    if emoji_count > settings.get('emoji_threshold', 6):
+        return "Emoji Spam"
+    if content.count('\n') > settings.get('newline_threshold', 10):
+        return "Newline Spam"
+    if legacy_check_char_spam(content, settings.get('char_repeat_threshold', 10)):
+        return "Character Spam"
+    words = content.split()
+    if len(words) > 5:
+        count = Counter(words).most_common(1)[0][1]
+        if count > settings.get('word_repeat_threshold', 5) and (count / len(words)) > 0.5:
+            return "Repeated Text"
+    return None
+
+
+def verdict(content, settings={}):
+    features = MessageFeatures(content)
+    for rule in CONTENT_RULES:
+        if rule.check(features, settings):
+            return rule.violation
+    return None
+
+
+def make_messages(length: int):
+    rng = random.Random(1234)
+
+    def prose(alphabet):
+        words = []
+        while sum(map(len, words)) + len(words) < length:
+            words.append(''.join(rng.choices(alphabet, k=rng.randint(1, 9))))
+        return ' '.join(words)[:length]
+
+    return {
+        'ascii prose': prose(string.ascii_lowercase * 8 + string.ascii_uppercase + ',.!?'),
+        'vietnamese prose': prose('aăâbcdđeêghiklmnoôơpqrstuưvxyàảãáạằẳẵắặầẩẫấậèẻẽéẹềểễếệ'),
+        'emoji heavy': prose(string.ascii_lowercase + '😀🔥❤✨' * 3 + '<:pog:123456789>'),
+        'char spam at end': prose(string.ascii_lowercase)[:length - 12] + 'a' * 12,
+        'repeated words': ' '.join(['spam'] * (length // 5))[:length],
+    }
+
+
+def main(length: int, number: int):
+    print(f"{length}-character messages, {number} runs each, all content rules enabled")
+    print(f"  {'shape':<18} {'old checks':>12} {'features':>12}   verdict")
+    for name, content in make_messages(length).items():
+        expected = legacy_verdict(content)
+        assert verdict(content) == expected, f"verdicts differ for {name}"
+        # Best of several interleaved runs, so drift or a scheduler hiccup doesn't decide the comparison
+        before = after = float('inf')
+        for _ in range(5):
+            before = min(before, timeit.timeit(lambda: legacy_verdict(content), number=number) / number)
+            after = min(after, timeit.timeit(lambda: verdict(content), number=number) / number)
+        print(f"  {name:<18} {before * 1e6:10.1f}us {after * 1e6:10.1f}us   {expected}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--length', type=int, default=2000)
+    parser.add_argument('--number', type=int, default=2000)
+    args = parser.parse_args()
+    main(args.length, args.number)
@@ -0,0 +1,78 @@
+"""Compare the automod word filter: the old compile-per-word loop vs WordMatcher.
+
+Run from the repository root:
+
+    python -m benchmarks.word_filter [--messages 100000] [--words 1000] [--legacy-sample 1000]
+
+The legacy loop compiles every word for every message (Python's regex
+cache holds 512 patterns, so with 1000 words nothing stays cached). It is
+timed on a sample of the messages and extrapolated to the full run.
+"""
+import argparse
+import random
+import re
+import string
+import time
+
+from utils.word_filter import WordMatcher
+
+
+def legacy_search(words, content):
+    """The pre-compilation implementation, kept here as the baseline."""
+    for word in words:
+        pattern = re.compile(rf'\b{re.escape(word)}\b', re.IGNORECASE)
+        if pattern.search(content):
+            return word
+    return None
+
+
+def random_word(rng: random.Random, low: int = 3, high: int = 10) -> str:
+    return ''.join(rng.choices(string.ascii_lowercase, k=rng.randint(low, high)))
+
+
+def make_messages(rng: random.Random, count: int, words, hit_rate: float):
+    words = list(words)
+    messages = []
+    for _ in range(count):
+        tokens = [random_word(rng, 1, 8) for _ in range(rng.randint(3, 40))]
+        if rng.random() < hit_rate:
+            tokens.insert(rng.randrange(len(tokens) + 1), rng.choice(words).upper())
+        messages.append(' '.join(tokens))
+    return messages
+
+
+def main(count: int, word_count: int, legacy_sample: int, hit_rate: float):
+    rng = random.Random(1234)
+    words = sorted({random_word(rng, 4, 12) for _ in range(word_count * 2)})[:word_count]
+    rng.shuffle(words)
+    messages = make_messages(rng, count, words, hit_rate)
+
+    start = time.perf_counter()
+    matcher = WordMatcher(words)
+    compile_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    after = [matcher.search(content) is not None for content in messages]
+    after_time = time.perf_counter() - start
+
+    sample = messages[:legacy_sample]
+    start = time.perf_counter()
+    before = [legacy_search(words, content) is not None for content in sample]
+    before_time = (time.perf_counter() - start) * len(messages) / max(len(sample), 1)
+
+    assert before == after[:len(sample)], "compiled matcher disagrees with the per-word loop"
+
+    print(f"{len(messages)} messages, {len(words)} filter words, {sum(after)} hits")
+    print(f"  per-word loop:  {before_time:8.2f}s  (extrapolated from {len(sample)} messages)")
+    print(f"  WordMatcher:    {after_time:8.2f}s  (+{compile_time * 1000:.1f}ms to compile)")
+    print(f"  speedup:        {before_time / after_time:8.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--messages', type=int, default=100000)
+    parser.add_argument('--words', type=int, default=1000)
+    parser.add_argument('--legacy-sample', type=int, default=1000)
+    parser.add_argument('--hit-rate', type=float, default=0.05)
+    args = parser.parse_args()
+    main(args.messages, args.words, args.legacy_sample, args.hit_rate)
@@ -1,43 +1,92 @@
+import asyncio
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 import json
 import os
 import re
-import time
 from datetime import datetime, timezone, timedelta
-from collections import defaultdict, Counter
 import logging
-import re
+import operator
+from typing import NamedTuple
+
+from core.pipeline import Stage
+from utils.action_queue import GuildActionQueue, bulk_delete
+from utils.fingerprints import DuplicateDetector
+from utils.links import LinkFilter, extract_links
+from utils.message_features import MessageFeatures, ThresholdRule
+from utils.rate_window import SlidingWindowCounter
+from utils.word_filter import WordMatcher
 
 logger = logging.getLogger(__name__)
 
+# Most warnings listed in one merged embed
+MAX_MERGED_WARNINGS = 20
+
+
+class Violation(NamedTuple):
+    message: discord.Message
+    violation_type: str
+    description: str
+    count: int  # the author's violations in the last 24h, this one included
+
+
+# Checks on a message's own shape. They all read from one MessageFeatures,
+# so each measurement is made at most once. Caps runs before the link and
+# image checks and the rest after them, the order automod has always used.
+CAPS_RULE = ThresholdRule('caps_filter', 'caps_percentage', 'caps_percentage', 70,
+                          "Excessive Caps", "{mention}, please avoid using excessive capital letters.")
+SHAPE_RULES = (
+    ThresholdRule('emoji_spam', 'emojis', 'emoji_threshold', 6,
+                  "Emoji Spam", "{mention}, please use fewer emojis."),
+    ThresholdRule('newline_spam', 'newlines', 'newline_threshold', 10,
+                  "Newline Spam", "{mention}, please use fewer line breaks."),
+    ThresholdRule('char_spam', 'longest_run', 'char_repeat_threshold', 10,
+                  "Character Spam", "{mention}, please avoid repeating characters.", operator.ge),
+    ThresholdRule('repeated_text', 'repeated_words', 'word_repeat_threshold', 5,
+                  "Repeated Text", "{mention}, please avoid repeating the same word or phrase excessively."),
+)
+CONTENT_RULES = (CAPS_RULE, *SHAPE_RULES)
+
 class AutoMod(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.config_file = "cogs/data/automod_config.json"
         self.config = {}
-        self.spam_tracker = defaultdict(list)
         self.spam_threshold = 5  # Max messages within the interval
         self.spam_interval = 10  # Time window in seconds
         self.mention_threshold = 5  # mentions
-        self.image_spam_tracker = defaultdict(list)
         self.image_spam_interval = 10  # seconds
         self.image_spam_threshold = 3  # images
+
+        # Recent message/image times per (guild, user)
+        self.spam_tracker = SlidingWindowCounter(self.spam_interval)
+        self.image_spam_tracker = SlidingWindowCounter(self.image_spam_interval)
         
         # Mass emoji, newline/character spam detection.
         
         self.emoji_threshold = 6  # Max emojis per message
         self.newline_threshold = 10  # Max newlines per message
         self.char_repeat_threshold = 10  # Max repeated characters
+
+        # Same content from many accounts or across many channels (raids, cross-posting)
+        self.duplicate_detector = DuplicateDetector(window=15)
+        self.raid_user_threshold = 4  # Distinct users posting the same thing
+        self.raid_channel_threshold = 3  # Distinct channels it was posted in
         
         # Violation Escalation
-        self.violation_counts = defaultdict(int)
-        self.last_violation_time = defaultdict(float)
         self.violation_reset_time = 86400  # 24 hours
+        self.violation_tracker = SlidingWindowCounter(self.violation_reset_time)
+
+        # Deletions, punishments and notices are applied off the message listener
+        self.actions = GuildActionQueue(self.apply_violations)
+        self.punishment_limiter = asyncio.Semaphore(5)  # member actions in flight at once
 
         # Log channel id per guild
         self.log_channels = {}
         
+        # Compiled form of config["word_filter"], rebuilt whenever the list changes
+        self.word_matcher = WordMatcher()
+
         # Load config
         self.load_config()
 
@@ -53,8 +102,13 @@ class AutoMod(commands.Cog):
             "scam_detection": False,
             "emoji_spam": False,
             "newline_spam": False,
-            "char_spam": False
+            "char_spam": False,
+            "raid_detection": False
         }
+        # Known scam domains and lookalikes of official ones, plus any list files present
+        self.link_filter = LinkFilter()
+        self.link_filter.load("cogs/data/link_blocklist.txt", "cogs/data/link_allowlist.txt")
+
         # scam link patterns. Let's see...
         self.scam_patterns = [
             # Discord related scams
@@ -62,8 +116,6 @@ class AutoMod(commands.Cog):
             r'free\s*nitro',
             # Steam scams
             r'steam(?:community|gift|profile|game)',
-            # Common scam domains
-            r'(?:dlscord|discorde?|steamcommunlty|dlscordgift|discordgift|steamgift)\.(?:com|net|org|gift|ru|gg|app)',
             # Generic prize scams
             r'(?:free|get|claim|limited)\s*(?:gift|prize|money|nitro|game)',
             # Crypto scams
@@ -77,6 +129,21 @@ class AutoMod(commands.Cog):
         ]
         self.scam_regex = re.compile('|'.join(self.scam_patterns), re.IGNORECASE)
 
+    async def cog_load(self):
+        self.sweep_trackers.start()
+        self.bot.pipeline.register(Stage.MODERATE, "automod", self.moderate)
+
+    def cog_unload(self):
+        self.bot.pipeline.unregister("automod")
+        self.sweep_trackers.cancel()
+        self.actions.close()
+
+    @tasks.loop(minutes=10)
+    async def sweep_trackers(self):
+        """Drop users who have gone quiet so the trackers don't grow with uptime."""
+        for tracker in (self.spam_tracker, self.image_spam_tracker, self.violation_tracker):
+            tracker.sweep()
+        self.duplicate_detector.sweep()
 
     def load_config(self):
         """Load the automod configuration."""
@@ -98,6 +165,7 @@ class AutoMod(commands.Cog):
                 "warn_threshold": 3,
                 "user_warnings": {}
             }
+        self.word_matcher.update(self.config.get("word_filter", []))
 
     def save_config(self):
         """Save the automod configuration."""
@@ -108,96 +176,132 @@ class AutoMod(commands.Cog):
             logger.exception("Failed to save config:")
             
 
-    def count_emojis(self, content):
-        """Count both custom and unicode emojis in a message."""
-        # Custom emoji pattern
-        custom_emoji = re.findall(r'<a?:[a-zA-Z0-9_]+:\d+>', content)
-        # Unicode emoji pattern
-        unicode_emoji = re.findall(r'[\U0001F300-\U0001F9FF\u2600-\u26FF\u2700-\u27BF]', content)
-        return len(custom_emoji) + len(unicode_emoji)
-
-    def check_char_spam(self, content, threshold):
-        """Check for repeated character spam."""
-        if not content:
-            return False
-        # Count consecutive repeated characters
-        count = 1
-        prev_char = content[0]
-        for char in content[1:]:
-            if char == prev_char:
-                count += 1
-                if count >= threshold:
-                    return True
-            else:
-                count = 1
-                prev_char = char
-        return False
-
     async def handle_violation(self, message, violation_type, description):
-        """Handle violations with escalating punishments."""
-        
-        # You better not kicking the guild owner lmao.
-        if message.author.id == message.guild.owner_id:
-            return
-        
-        current_time = time.time()
-        user_id = message.author.id
-        
-        # Reset violations if last one was more than 24h ago
-        if current_time - self.last_violation_time[user_id] > self.violation_reset_time:
-            self.violation_counts[user_id] = 0
+        """Count the violation and queue its punishment; the pipeline never waits on Discord."""
+        # Violations in the last 24h decide the punishment
+        count = self.violation_tracker.hit((message.guild.id, message.author.id))
+        self.actions.put(message.guild.id, Violation(message, violation_type, description, count))
+
+    async def check_rules(self, rules, message, features, settings):
+        """Raise a violation for the first enabled rule that fires; True if one did."""
+        for rule in rules:
+            if settings.get(rule.setting, True) and rule.check(features, settings):
+                await self.handle_violation(
+                    message,
+                    rule.violation,
+                    rule.message.format(mention=message.author.mention)
+                )
+                return True
+        return False
 
-        self.violation_counts[user_id] += 1
-        self.last_violation_time[user_id] = current_time
-        count = self.violation_counts[user_id]
+    async def punish(self, member, count, violation_type):
+        """Apply the escalating punishment for a member's ``count``-th violation and describe it."""
+        if not isinstance(member, discord.Member):
+            return "No action (user left)"
+        reason = f"AutoMod: {violation_type}"
+        try:
+            async with self.punishment_limiter:
+                if count == 1:
+                    # First offense: Warning
+                    return "Warning issued"
+                elif count == 2:
+                    # Second offense: 5 minute timeout
+                    await member.timeout(timedelta(minutes=5), reason=reason)
+                    return "5 minute timeout"
+                elif count == 3:
+                    # Third offense: 1 hour timeout
+                    await member.timeout(timedelta(hours=1), reason=reason)
+                    return "1 hour timeout"
+                elif count == 4:
+                    # Fourth offense: Mute
+                    mute_role = discord.utils.get(member.guild.roles, name="Muted")
+                    if not mute_role:
+                        return "Warning issued (no Muted role)"
+                    await member.add_roles(mute_role, reason=reason)
+                    return "Muted indefinitely"
+                else:
+                    # Fifth+ offense: Kick
+                    await member.kick(reason=f"AutoMod: Multiple {violation_type} violations")
+                    return "Kicked from server"
+        except discord.HTTPException as e:
+            logger.warning(f"AutoMod could not punish {member} ({member.id}): {e}")
+            return "Punishment failed"
+
+    async def apply_violations(self, guild_id, violations):
+        """Apply one batch of queued violations from a guild.
+
+        All offending messages go in bulk deletes, each member gets only
+        the punishment for their highest count in the batch, punishments
+        run concurrently, and each channel gets one warning embed.
+        """
+        deletion = asyncio.ensure_future(bulk_delete(v.message for v in violations))
+
+        worst = {}
+        for violation in violations:
+            current = worst.get(violation.message.author.id)
+            if current is None or violation.count > current.count:
+                worst[violation.message.author.id] = violation
+        actions = await asyncio.gather(*(
+            self.punish(v.message.author, v.count, v.violation_type) for v in worst.values()
+        ))
+        action_for = {user_id: action for user_id, action in zip(worst, actions)}
+        await deletion
+
+        by_channel = {}
+        for violation in violations:
+            by_channel.setdefault(violation.message.channel.id, []).append(violation)
+        sends = [
+            channel_violations[0].message.channel.send(embed=self.violation_embed(channel_violations, action_for))
+            for channel_violations in by_channel.values()
+        ]
+        results = await asyncio.gather(*sends, return_exceptions=True)
+        for result in results:
+            if isinstance(result, Exception):
+                logger.warning(f"Failed to send AutoMod warning: {result}")
+
+        guild = violations[0].message.guild
+        if len(violations) == 1:
+            v = violations[0]
+            await self.log_action(
+                guild,
+                v.violation_type,
+                v.message.author,
+                f"Action taken: {action_for[v.message.author.id]}\nReason: {v.description}"
+            )
+        else:
+            lines = [
+                f"{v.message.author} ({v.message.author.id}): {v.violation_type} - {action_for[v.message.author.id]}"
+                for v in worst.values()
+            ]
+            await self.log_action(guild, f"{len(violations)} violations", None, "\n".join(lines)[:4096])
 
-        # Delete the offending message
-        await message.delete()
+    def violation_embed(self, violations, action_for):
+        """The warning posted in a channel: the classic embed for one violation, a merged list for more."""
+        if len(violations) == 1:
+            v = violations[0]
+            embed = discord.Embed(
+                title=f"AutoMod: {v.violation_type}",
+                description=v.description,
+                color=discord.Color.red(),
+                timestamp=datetime.now(timezone.utc)
+            )
+            embed.add_field(name="Action", value=action_for[v.message.author.id], inline=False)
+            embed.add_field(name="Violation Count", value=f"{v.count} violations in 24h", inline=False)
+            return embed
 
-        # Prepare the base embed
-        embed = discord.Embed(
-            title=f"AutoMod: {violation_type}",
-            description=description,
+        lines = [
+            f"{v.message.author.mention}: {v.violation_type} ({action_for[v.message.author.id]})"
+            for v in violations[:MAX_MERGED_WARNINGS]
+        ]
+        if len(violations) > MAX_MERGED_WARNINGS:
+            lines.append(f"...and {len(violations) - MAX_MERGED_WARNINGS} more")
+        return discord.Embed(
+            title=f"AutoMod: {len(violations)} violations",
+            description="\n".join(lines),
             color=discord.Color.red(),
             timestamp=datetime.now(timezone.utc)
         )
 
-        # Apply escalating punishments
-        if count == 1:
-            # First offense: Warning
-            embed.add_field(name="Action", value="Warning issued", inline=False)
-            
-        elif count == 2:
-            # Second offense: 5 minute timeout
-            await message.author.timeout(timedelta(minutes=5), reason=f"AutoMod: {violation_type}")
-            embed.add_field(name="Action", value="5 minute timeout", inline=False)
-            
-        elif count == 3:
-            # Third offense: 1 hour timeout
-            await message.author.timeout(timedelta(hours=1), reason=f"AutoMod: {violation_type}")
-            embed.add_field(name="Action", value="1 hour timeout", inline=False)
-            
-        elif count == 4:
-            # Fourth offense: Mute
-            mute_role = discord.utils.get(message.guild.roles, name="Muted")
-            if mute_role:
-                await message.author.add_roles(mute_role, reason=f"AutoMod: {violation_type}")
-                embed.add_field(name="Action", value="Muted indefinitely", inline=False)
-            
-        else:
-            # Fifth+ offense: Kick
-            await message.author.kick(reason=f"AutoMod: Multiple {violation_type} violations")
-            embed.add_field(name="Action", value="Kicked from server", inline=False)
-
-        embed.add_field(name="Violation Count", value=f"{count} violations in 24h", inline=False)
-        await message.channel.send(embed=embed)
-        await self.log_action(
-            message.guild,
-            violation_type,
-            message.author,
-            f"Action taken: {embed.fields[-1].value}\nReason: {description}"
-            )
-
     async def log_action(self, guild, action_type, user, description, color=discord.Color.orange()):
         """Log AutoMod actions to the designated channel."""
         guild_id = str(guild.id)
@@ -214,7 +318,8 @@ class AutoMod(commands.Cog):
             color=color,
             timestamp=datetime.now(timezone.utc)
         )
-        embed.add_field(name="User", value=f"{user} ({user.id})", inline=False)
+        if user is not None:
+            embed.add_field(name="User", value=f"{user} ({user.id})", inline=False)
         await log_channel.send(embed=embed)
 
 
@@ -371,7 +476,9 @@ class AutoMod(commands.Cog):
                 "Image Spam": settings.get('image_threshold', self.image_spam_threshold),
                 "Emoji Limit": settings.get('emoji_threshold', self.emoji_threshold),
                 "Newline Limit": settings.get('newline_threshold', self.newline_threshold),
-                "Character Repeat": settings.get('char_repeat_threshold', self.char_repeat_threshold)
+                "Character Repeat": settings.get('char_repeat_threshold', self.char_repeat_threshold),
+                "Raid Users": settings.get('raid_user_threshold', self.raid_user_threshold),
+                "Raid Channels": settings.get('raid_channel_threshold', self.raid_channel_threshold)
             }
             
             for name, value in thresholds.items():
@@ -396,7 +503,9 @@ class AutoMod(commands.Cog):
             'images': ('image_threshold', 1, 10),
             'emojis': ('emoji_threshold', 1, 20),
             'newlines': ('newline_threshold', 1, 20),
-            'chars': ('char_repeat_threshold', 3, 20)
+            'chars': ('char_repeat_threshold', 3, 20),
+            'raidusers': ('raid_user_threshold', 2, 20),
+            'raidchannels': ('raid_channel_threshold', 2, 20)
         }
 
         if threshold_type not in valid_types:
@@ -465,6 +574,7 @@ class AutoMod(commands.Cog):
         if word.lower() not in word_filter:
             word_filter.append(word.lower())
             self.config["word_filter"] = word_filter
+            self.word_matcher.update(word_filter)
             self.save_config()
             embed = discord.Embed(
                 title="Word Added",
@@ -490,6 +600,7 @@ class AutoMod(commands.Cog):
         if word.lower() in word_filter:
             word_filter.remove(word.lower())
             self.config["word_filter"] = word_filter
+            self.word_matcher.update(word_filter)
             self.save_config()
             embed = discord.Embed(
                 title="Word Removed",
@@ -507,18 +618,19 @@ class AutoMod(commands.Cog):
             )
             await ctx.send(embed=embed)
 
-    @commands.Cog.listener()
-    async def on_message(self, message):
-        """Automod features implemented through message listener."""
-        if message.author.bot:
-            return
-        ctx = await self.bot.get_context(message)
-        if ctx.valid:
-            return  # Ignore messages that are commands
-        
-        guild_id = str(message.guild.id)
+    async def moderate(self, context):
+        """Pipeline stage: check a guild message against every enabled feature.
+
+        Returns True when the message broke a rule, so later stages skip it.
+        """
+        message = context.message
+        # You better not kicking the guild owner lmao.
+        if message.author.id == message.guild.owner_id:
+            return False
+
+        guild_id = str(context.guild_id)
         settings = self.config.get(guild_id, self.default_settings)
-        current_time = time.time()
+        tracker_key = (message.guild.id, message.author.id)
         
         # Mention spam protection
         if settings.get('mention_spam', True):
@@ -530,138 +642,100 @@ class AutoMod(commands.Cog):
                     "Excessive Mentions",
                     f"{message.author.mention}, please avoid mentioning too many users or roles."
                 )
-                return
+                return True
 
         # Word filter
         if settings.get('word_filter', True):
-            word_filter = self.config.get("word_filter", [])
-            for word in word_filter:
-                pattern = re.compile(rf'\b{re.escape(word)}\b', re.IGNORECASE)
-                if pattern.search(message.content):
-                    await self.handle_violation(
-                        message,
-                        "Prohibited Word",
-                        f"{message.author.mention}, you used a prohibited word."
-                    )
-                    return
+            if self.word_matcher.search(message.content):
+                await self.handle_violation(
+                    message,
+                    "Prohibited Word",
+                    f"{message.author.mention}, you used a prohibited word."
+                )
+                return True
             
         # Spam detection
         if settings.get('spam_detection', True):
             spam_interval = settings.get('spam_interval', self.spam_interval)
-            self.spam_tracker[message.author.id].append(current_time)
-            self.spam_tracker[message.author.id] = [
-                t for t in self.spam_tracker[message.author.id]
-                if current_time - t <= spam_interval
-            ]
+            recent_messages = self.spam_tracker.hit(tracker_key, spam_interval)
             spam_threshold = settings.get('spam_threshold', self.spam_threshold)
-            if len(self.spam_tracker[message.author.id]) > spam_threshold:
+            if recent_messages > spam_threshold:
                 await self.handle_violation(
                     message,
                     "Message Spam",
                     f"{message.author.mention}, please stop spamming."
                 )
-                return
+                return True
 
-        # Caps filter
-        if settings.get('caps_filter', True):
-            caps_count = sum(1 for c in message.content if c.isupper())
-            caps_percentage = settings.get('caps_percentage', 70)
-            if len(message.content) > 10 and (caps_count / len(message.content)) * 100 > caps_percentage:
+        # Duplicate content across users/channels
+        if settings.get('raid_detection', self.default_settings['raid_detection']) and message.content:
+            users, channels = self.duplicate_detector.check(
+                message.guild.id, message.author.id, message.channel.id, message.content
+            )
+            if users >= settings.get('raid_user_threshold', self.raid_user_threshold):
                 await self.handle_violation(
                     message,
-                    "Excessive Caps",
-                    f"{message.author.mention}, please avoid using excessive capital letters."
+                    "Raid Detected",
+                    f"{message.author.mention}, the same message is being posted by {users} users."
                 )
-                return
+                return True
+            if channels >= settings.get('raid_channel_threshold', self.raid_channel_threshold):
+                await self.handle_violation(
+                    message,
+                    "Cross-Channel Spam",
+                    f"{message.author.mention}, please don't post the same message in multiple channels."
+                )
+                return True
+
+        # Measured lazily: only what the enabled rules read
+        features = MessageFeatures(message.content)
+
+        # Caps filter
+        if await self.check_rules((CAPS_RULE,), message, features, settings):
+            return True
+
+        # Links are parsed once for both the invite and scam checks
+        links = []
+        if settings.get('invite_filter', True) or settings.get('scam_detection', True):
+            links = extract_links(message.content)
 
         # Invite link detection
         if settings.get('invite_filter', True):
-            invite_pattern = re.compile(r'discord(?:\.gg|app\.com/invite)/[\w-]+')
-            if invite_pattern.search(message.content):
+            if any(link.is_invite for link in links):
                 await self.handle_violation(
                     message,
                     "Invite Link",
                     f"{message.author.mention}, please do not post invite links."
                 )
-                return
+                return True
 
         # Image spam detection
         if settings.get('image_spam', True):
             if len(message.attachments) > 0:
-                self.image_spam_tracker[message.author.id].append(current_time)
                 image_interval = settings.get('image_interval', self.image_spam_interval)
-                self.image_spam_tracker[message.author.id] = [
-                    t for t in self.image_spam_tracker[message.author.id]
-                    if current_time - t <= image_interval
-                ]
+                recent_images = self.image_spam_tracker.hit(tracker_key, image_interval)
                 image_threshold = settings.get('image_threshold', self.image_spam_threshold)
-                if len(self.image_spam_tracker[message.author.id]) > image_threshold:
+                if recent_images > image_threshold:
                     await self.handle_violation(
                         message,
                         "Image Spam",
                         f"{message.author.mention}, please stop spamming images."
                     )
-                    return
-
-        # Emoji spam detection
-        if settings.get('emoji_spam', True):
-            emoji_count = self.count_emojis(message.content)
-            emoji_threshold = settings.get('emoji_threshold', self.emoji_threshold)
-            if emoji_count > emoji_threshold:
-                await self.handle_violation(
-                    message,
-                    "Emoji Spam",
-                    f"{message.author.mention}, please use fewer emojis."
-                )
-                return
-
-        # Newline spam detection
-        if settings.get('newline_spam', True):
-            newline_count = message.content.count('\n')
-            newline_threshold = settings.get('newline_threshold', self.newline_threshold)
-            if newline_count > newline_threshold:
-                await self.handle_violation(
-                    message,
-                    "Newline Spam",
-                    f"{message.author.mention}, please use fewer line breaks."
-                )
-                return
+                    return True
 
-        # Character spam detection
-        if settings.get('char_spam', True):
-            char_threshold = settings.get('char_repeat_threshold', self.char_repeat_threshold)
-            if self.check_char_spam(message.content, char_threshold):
-                await self.handle_violation(
-                    message,
-                    "Character Spam",
-                    f"{message.author.mention}, please avoid repeating characters."
-                )
-                return
-
-        # Repeated text detection
-        if settings.get('repeated_text', True):
-            words = message.content.split()
-            if len(words) > 5:
-                word_counts = Counter(words)
-                most_common_word, count = word_counts.most_common(1)[0]
-                word_repeat_threshold = settings.get('word_repeat_threshold', 5)
-                if count > word_repeat_threshold and (count / len(words)) > 0.5:
-                    await self.handle_violation(
-                        message,
-                        "Repeated Text",
-                        f"{message.author.mention}, please avoid repeating the same word or phrase excessively."
-                    )
-                    return
+        # Emoji, newline, character and repeated word limits
+        if await self.check_rules(SHAPE_RULES, message, features, settings):
+            return True
 
         # Scam detection with comprehensive patterns
         if settings.get('scam_detection', True):
-            if self.scam_regex.search(message.content):
+            if any(self.link_filter.is_blocked(link.host) for link in links) or self.scam_regex.search(message.content):
                 await self.handle_violation(
                     message,
                     "Potential Scam",
                     f"{message.author.mention}, your message was flagged as a potential scam."
                 )
-                return
+                return True
 
 async def setup(bot):
     await bot.add_cog(AutoMod(bot))
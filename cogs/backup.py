@@ -0,0 +1,67 @@
+import discord
+from discord.ext import commands, tasks
+from discord.ext.commands import Context
+import logging
+import os
+
+from .database.backup import BackupError, BackupService
+from .database.db_manager import DatabaseError
+
+logger = logging.getLogger(__name__)
+
+
+class Backup(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+        self.service = BackupService()
+
+    async def cog_load(self):
+        self.scheduled_backup.start()
+
+    def cog_unload(self):
+        self.scheduled_backup.cancel()
+
+    async def flush_pending_writes(self):
+        """Write XP the level system still holds in memory so snapshots include it"""
+        levels = self.bot.get_cog("LevelSystem")
+        if levels is None:
+            return
+        try:
+            await levels.db.flush_xp()
+        except DatabaseError as e:
+            logger.warning(f"Backing up without unflushed XP: {e}")
+
+    @tasks.loop(hours=6)
+    async def scheduled_backup(self):
+        await self.flush_pending_writes()
+        try:
+            await self.service.snapshot()
+        except BackupError as e:
+            logger.error(f"Scheduled backup skipped: {e}")
+
+    @scheduled_backup.before_loop
+    async def before_scheduled_backup(self):
+        await self.bot.wait_until_ready()
+
+    @commands.hybrid_command(name="backup", description="Snapshot the bot's databases and settings")
+    @commands.is_owner()
+    async def backup(self, ctx: Context):
+        await ctx.defer()
+        await self.flush_pending_writes()
+        try:
+            path = await self.service.snapshot()
+        except BackupError as e:
+            await ctx.send(embed=discord.Embed(title="❌ Backup Failed", description=str(e), color=discord.Color.red()))
+            return
+
+        embed = discord.Embed(
+            title="💾 Backup Created",
+            description=f"`{os.path.basename(path)}` ({os.path.getsize(path) / 1024 / 1024:.1f} MB)",
+            color=discord.Color.blue()
+        )
+        embed.set_footer(text=f"Keeping the latest {self.service.keep} snapshots")
+        await ctx.send(embed=embed)
+
+
+async def setup(bot):
+    await bot.add_cog(Backup(bot))
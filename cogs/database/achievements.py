@@ -0,0 +1,79 @@
+from bisect import bisect_right
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# achievements.metric values and the users expression each one is measured against
+METRIC_COLUMNS = {
+    'balance': 'balance',
+    'streak': 'streak',
+    'trades': 'trades_completed',
+    'gamble_wins': 'gamble_wins',
+    'total_gambles': 'total_gambles',
+    'work_count': 'work_count',
+    'work_earnings': 'work_earnings',
+    'items_bought': 'items_bought',
+    'limited_items_bought': 'limited_items_bought',
+    'total_spent': 'total_spent',
+    'unique_items': '(SELECT COUNT(DISTINCT item_id) FROM inventory WHERE inventory.user_id = users.user_id)',
+}
+
+
+class AchievementCatalog:
+    """Achievements grouped by metric with requirements sorted for bisecting.
+
+    The table only changes through migrations, so it is loaded once and
+    each check is a bisect per metric instead of a query.
+    """
+
+    def __init__(self, rows: Iterable[Tuple[int, Optional[str], int, int]] = ()):
+        self._requirements: Dict[str, List[int]] = {}
+        self._achievements: Dict[str, List[Tuple[int, int]]] = {}
+        by_metric: Dict[str, List[Tuple[int, int, int]]] = {}
+        for ach_id, metric, requirement, reward in rows:
+            if metric is None:
+                continue
+            by_metric.setdefault(metric, []).append((requirement, ach_id, reward))
+        for metric, entries in by_metric.items():
+            entries.sort()
+            self._requirements[metric] = [requirement for requirement, _, _ in entries]
+            self._achievements[metric] = [(ach_id, reward) for _, ach_id, reward in entries]
+
+    def __len__(self) -> int:
+        return sum(len(achievements) for achievements in self._achievements.values())
+
+    def reached(self, metric: str, value: int) -> List[Tuple[int, int]]:
+        """(achievement_id, reward) for every achievement of ``metric`` with requirement <= value"""
+        requirements = self._requirements.get(metric)
+        if not requirements:
+            return []
+        return self._achievements[metric][:bisect_right(requirements, value)]
+
+    def evaluate(self, values: Dict[str, int], completed: Iterable[int]) -> List[Tuple[int, int]]:
+        """Newly earned (achievement_id, reward) pairs for the given metric values.
+
+        Rewards are paid into the balance, so when ``balance`` is among the
+        values it is re-checked with the rewards added until nothing new
+        is reached.
+        """
+        done = set(completed)
+        earned: List[Tuple[int, int]] = []
+
+        def collect(metric: str, value: int) -> int:
+            paid = 0
+            for ach_id, reward in self.reached(metric, value):
+                if ach_id not in done:
+                    done.add(ach_id)
+                    earned.append((ach_id, reward))
+                    paid += reward
+            return paid
+
+        total = 0
+        for metric, value in values.items():
+            if metric != 'balance':
+                total += collect(metric, value)
+        if 'balance' in values:
+            balance = values['balance'] + total
+            paid = collect('balance', balance)
+            while paid:
+                balance += paid
+                paid = collect('balance', balance)
+        return earned
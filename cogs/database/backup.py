@@ -0,0 +1,151 @@
+import asyncio
+import glob
+import gzip
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import tarfile
+import tempfile
+import time
+from datetime import datetime
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = 'cogs/data'
+BACKUP_DIR = 'cogs/data/backups'
+SNAPSHOT_PREFIX = 'snapshot_'
+SNAPSHOT_SUFFIX = '.tar.gz'
+
+
+class BackupError(Exception):
+    pass
+
+
+def backup_sqlite(src_path: str, dest_path: str, pages: int = 1024, sleep: float = 0.005):
+    """Copy a live SQLite database with the online backup API.
+
+    Runs synchronously; call it from a worker thread. The source lock is
+    only held for ``pages`` pages at a time, so writers on other
+    connections keep going between steps.
+    """
+    src = sqlite3.connect(f'file:{src_path}?mode=ro', uri=True)
+    try:
+        dest = sqlite3.connect(dest_path)
+        try:
+            src.backup(dest, pages=pages, sleep=sleep)
+        finally:
+            dest.close()
+    finally:
+        src.close()
+
+
+def gzip_file(src_path: str, dest_path: str, chunk_size: int = 1024 * 1024):
+    """Stream-compress ``src_path`` into ``dest_path``"""
+    with open(src_path, 'rb') as src, gzip.open(dest_path, 'wb', compresslevel=6) as dest:
+        shutil.copyfileobj(src, dest, chunk_size)
+
+
+def read_json_snapshot(path: str, attempts: int = 3) -> Optional[bytes]:
+    """Read a JSON state file, retrying if it is caught half-written"""
+    for attempt in range(attempts):
+        with open(path, 'rb') as f:
+            data = f.read()
+        try:
+            json.loads(data)
+            return data
+        except ValueError:
+            time.sleep(0.05 * (attempt + 1))
+    return None
+
+
+class BackupService:
+    """Timestamped, compressed snapshots of every database and JSON state file.
+
+    A snapshot is a single ``snapshot_<timestamp>.tar.gz`` holding a
+    backup-API copy of each ``*.db`` and a validated copy of each
+    ``*.json`` in the data directory. All file work runs in a worker
+    thread so the event loop keeps serving the gateway. Only the newest
+    ``keep`` snapshots are retained.
+    """
+
+    def __init__(self, data_dir: str = DATA_DIR, backup_dir: str = BACKUP_DIR, keep: int = 7,
+                 pages: int = 1024, sleep: float = 0.005):
+        self.data_dir = data_dir
+        self.backup_dir = backup_dir
+        self.keep = keep
+        self.pages = pages
+        self.sleep = sleep
+        self._lock = asyncio.Lock()
+
+    def list_snapshots(self) -> List[str]:
+        """Snapshot paths, oldest first"""
+        return sorted(glob.glob(os.path.join(self.backup_dir, f'{SNAPSHOT_PREFIX}*{SNAPSHOT_SUFFIX}')))
+
+    async def snapshot(self) -> str:
+        """Write a new snapshot, rotate old ones and return the snapshot path"""
+        if self._lock.locked():
+            raise BackupError("A backup is already running")
+        async with self._lock:
+            try:
+                return await asyncio.to_thread(self._snapshot)
+            except Exception as e:
+                logger.error(f"Failed to create backup snapshot: {e}")
+                raise BackupError(f"Backup failed: {str(e)}")
+
+    def _snapshot(self) -> str:
+        started = time.perf_counter()
+        os.makedirs(self.backup_dir, exist_ok=True)
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        final_path = os.path.join(self.backup_dir, f'{SNAPSHOT_PREFIX}{timestamp}{SNAPSHOT_SUFFIX}')
+        partial_path = final_path + '.partial'
+
+        with tempfile.TemporaryDirectory(dir=self.backup_dir) as staging:
+            for db_path in sorted(glob.glob(os.path.join(self.data_dir, '*.db'))):
+                backup_sqlite(db_path, os.path.join(staging, os.path.basename(db_path)), self.pages, self.sleep)
+
+            for json_path in sorted(glob.glob(os.path.join(self.data_dir, '*.json'))):
+                data = read_json_snapshot(json_path)
+                if data is None:
+                    logger.warning(f"Skipping {json_path} in backup: file is not valid JSON")
+                    continue
+                with open(os.path.join(staging, os.path.basename(json_path)), 'wb') as f:
+                    f.write(data)
+
+            with tarfile.open(partial_path, 'w:gz', compresslevel=6) as tar:
+                for name in sorted(os.listdir(staging)):
+                    tar.add(os.path.join(staging, name), arcname=name)
+
+        # Only complete archives ever carry the snapshot name
+        os.replace(partial_path, final_path)
+        self._rotate()
+        logger.info(f"Backup snapshot created at {final_path} in {time.perf_counter() - started:.1f}s")
+        return final_path
+
+    def _rotate(self):
+        snapshots = self.list_snapshots()
+        for path in snapshots[:max(len(snapshots) - self.keep, 0)]:
+            try:
+                os.remove(path)
+            except OSError as e:
+                logger.warning(f"Failed to remove old backup {path}: {e}")
+
+
+async def backup_database(db_path: str, backup_dir: Optional[str] = None, pages: int = 1024) -> str:
+    """Back up a single database to ``<name>.backup_<timestamp>.gz`` without blocking the loop"""
+    backup_dir = backup_dir or os.path.dirname(db_path) or '.'
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    dest_path = os.path.join(backup_dir, f'{os.path.basename(db_path)}.backup_{timestamp}.gz')
+
+    def run():
+        os.makedirs(backup_dir, exist_ok=True)
+        with tempfile.TemporaryDirectory(dir=backup_dir) as staging:
+            raw_path = os.path.join(staging, os.path.basename(db_path))
+            backup_sqlite(db_path, raw_path, pages)
+            gzip_file(raw_path, dest_path + '.partial')
+        os.replace(dest_path + '.partial', dest_path)
+        return dest_path
+
+    return await asyncio.to_thread(run)
@@ -1,25 +1,85 @@
-import aiosqlite
-import shutil
-import os
+import asyncio
 from datetime import datetime, timedelta
 import logging
 from typing import List, Dict, Optional, Tuple
 
+from .backup import backup_database
+from .guild_config import GuildConfig
+from .multipliers import GuildMultipliers
+from .pool import ConnectionPool
+from .xp_ledger import XPLedger
+
 logger = logging.getLogger(__name__)
 
 class DatabaseError(Exception):
     pass
 
 class LevelDatabase:
-    def __init__(self, db_path: str = 'cogs/data/levelup.db'):
+    # Stays well under SQLite's bound-parameter limit
+    IN_BATCH_SIZE = 500
+
+    def __init__(self, db_path: str = 'cogs/data/levelup.db', readers: int = 4):
         self.db_path = db_path
+        self.pool = ConnectionPool(db_path, readers=readers)
+        self.ledger = XPLedger()
+        self._flush_lock = asyncio.Lock()
+        self._configs: Dict[str, GuildConfig] = {}
+        self._config_generations: Dict[str, int] = {}
+        self._multipliers: Dict[str, GuildMultipliers] = {}
+        self._multiplier_generations: Dict[str, int] = {}
+
+    async def connect(self):
+        """Open the shared connection pool"""
+        await self.pool.open()
+
+    async def close(self):
+        """Flush pending XP and close the shared connection pool"""
+        try:
+            await self.flush_xp()
+        finally:
+            await self.pool.close()
+
+    async def flush_xp(self) -> int:
+        """Persist every dirty ledger row in one transaction and return the row count"""
+        async with self._flush_lock:
+            rows = self.ledger.take_dirty()
+            if not rows:
+                return 0
+            try:
+                async with self.pool.writer() as db:
+                    await db.executemany('''
+                        INSERT INTO levels (guild_id, user_id, xp, level)
+                        VALUES (?, ?, ?, ?)
+                        ON CONFLICT(guild_id, user_id)
+                        DO UPDATE SET xp = excluded.xp, level = excluded.level
+                    ''', rows)
+                    await db.commit()
+            except Exception as e:
+                self.ledger.mark_dirty((guild_id, user_id) for guild_id, user_id, _, _ in rows)
+                logger.error(f"Failed to flush XP ledger: {e}")
+                raise DatabaseError(f"XP flush failed: {str(e)}")
+            self.ledger.trim()
+            return len(rows)
+
+    async def _load_ledger_entry(self, guild_id: str, user_id: str):
+        """Seed the ledger with the persisted row for a user if it isn't held yet"""
+        if (guild_id, user_id) in self.ledger:
+            return
+        async with self.pool.reader() as db:
+            async with db.execute(
+                'SELECT xp, level FROM levels WHERE guild_id = ? AND user_id = ?',
+                (guild_id, user_id)
+            ) as cursor:
+                result = await cursor.fetchone()
+        xp, level = result if result else (0, 1)
+        self.ledger.load((guild_id, user_id), xp, level)
 
     async def backup_db(self) -> str:
-        """Create a timestamped backup of the database"""
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        backup_path = f"{self.db_path}.backup_{timestamp}"
+        """Create a compressed, timestamped backup of the live database"""
+        # XP still held in the ledger would otherwise be missing from the copy
+        await self.flush_xp()
         try:
-            shutil.copy2(self.db_path, backup_path)
+            backup_path = await backup_database(self.db_path)
             logger.info(f"Database backup created at {backup_path}")
             return backup_path
         except Exception as e:
@@ -28,7 +88,7 @@ class LevelDatabase:
 
     async def execute_transaction(self, queries: List[Tuple[str, tuple]]) -> None:
         """Execute multiple queries in a single transaction"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self.pool.writer() as db:
             try:
                 await db.execute("BEGIN TRANSACTION")
                 for query, params in queries:
@@ -40,8 +100,29 @@ class LevelDatabase:
                 raise DatabaseError(f"Database transaction failed: {str(e)}")
 
 
+    async def _load_ledger_entries(self, guild_id: str, user_ids: List[str]):
+        """Seed the ledger for many users at once, reading missing rows in IN (...) batches"""
+        missing = [user_id for user_id in dict.fromkeys(user_ids) if (guild_id, user_id) not in self.ledger]
+        found = {}
+        async with self.pool.reader() as db:
+            for i in range(0, len(missing), self.IN_BATCH_SIZE):
+                batch = missing[i:i + self.IN_BATCH_SIZE]
+                placeholders = ', '.join('?' * len(batch))
+                async with db.execute(
+                    f'SELECT user_id, xp, level FROM levels WHERE guild_id = ? AND user_id IN ({placeholders})',
+                    (guild_id, *batch)
+                ) as cursor:
+                    for user_id, xp, level in await cursor.fetchall():
+                        found[user_id] = (xp, level)
+        for user_id in missing:
+            xp, level = found.get(user_id, (0, 1))
+            self.ledger.load((guild_id, user_id), xp, level)
+
     async def get_user_level(self, guild_id: str, user_id: str) -> Dict:
-        async with aiosqlite.connect(self.db_path) as db:
+        cached = self.ledger.get((guild_id, user_id))
+        if cached:
+            return {"xp": cached[0], "level": cached[1]}
+        async with self.pool.reader() as db:
             async with db.execute(
                 'SELECT xp, level FROM levels WHERE guild_id = ? AND user_id = ?',
                 (guild_id, user_id)
@@ -52,76 +133,85 @@ class LevelDatabase:
                 return {"xp": 0, "level": 1}
                 
     async def update_user_level(self, guild_id: str, user_id: str, xp: int, level: int):
-        async with aiosqlite.connect(self.db_path) as db:
-            await db.execute('''
-                INSERT INTO levels (guild_id, user_id, xp, level)
-                VALUES (?, ?, ?, ?)
-                ON CONFLICT(guild_id, user_id) 
-                DO UPDATE SET xp = ?, level = ?
-            ''', (guild_id, user_id, xp, level, xp, level))
-            await db.commit()
+        # Under the flush lock, so a flush holding an older snapshot of this row can't overwrite it
+        async with self._flush_lock:
+            async with self.pool.writer() as db:
+                await db.execute('''
+                    INSERT INTO levels (guild_id, user_id, xp, level)
+                    VALUES (?, ?, ?, ?)
+                    ON CONFLICT(guild_id, user_id) 
+                    DO UPDATE SET xp = ?, level = ?
+                ''', (guild_id, user_id, xp, level, xp, level))
+                await db.commit()
+            if (guild_id, user_id) in self.ledger:
+                self.ledger.set((guild_id, user_id), xp, level, dirty=False)
 
-    async def get_guild_config(self, guild_id: str) -> Dict:
+    async def get_config(self, guild_id: str) -> GuildConfig:
+        """Return the cached config for a guild, loading it on first use"""
+        config = self._configs.get(guild_id)
+        if config is not None:
+            return config
+
+        generation = self._config_generations.get(guild_id, 0)
         try:
-            async with aiosqlite.connect(self.db_path) as db:
+            async with self.pool.reader() as db:
                 async with db.execute(
                     'SELECT xp_cooldown, xp_amount, level_channel_id, is_blocked FROM guild_config WHERE guild_id = ?',
                     (guild_id,)
                 ) as cursor:
-                    result = await cursor.fetchone()
-                    if result:
-                        return {
-                            "xp_cooldown": result[0],
-                            "xp_amount": result[1],
-                            "level_channel_id": result[2],
-                            "is_blocked": bool(result[3])
-                        }
-                    return {}
+                    row = await cursor.fetchone()
+                async with db.execute(
+                    'SELECT entity_id, entity_type FROM restricted_entities WHERE guild_id = ?',
+                    (guild_id,)
+                ) as cursor:
+                    restricted = await cursor.fetchall()
         except Exception as e:
             logger.error(f"Failed to get guild config: {e}")
             raise DatabaseError(f"Config retrieval failed: {str(e)}")
 
+        config = GuildConfig()
+        if row:
+            config.xp_cooldown = row[0]
+            config.xp_amount = row[1]
+            config.level_channel_id = row[2]
+            config.is_blocked = bool(row[3])
+        for entity_id, entity_type in restricted:
+            config.set_restricted(entity_id, entity_type, True)
+
+        # Only cache if no write invalidated this guild while we were reading
+        if self._config_generations.get(guild_id, 0) == generation:
+            self._configs[guild_id] = config
+        return config
+
+    def invalidate_config(self, guild_id: str):
+        """Drop a guild's cached config so the next read reloads it"""
+        self._configs.pop(guild_id, None)
+        self._config_generations[guild_id] = self._config_generations.get(guild_id, 0) + 1
 
-    async def add_xp(self, guild_id: str, user_id: str, xp_amount: int) -> tuple[bool, int, int]:
-        """Add XP to user and return (leveled_up, new_level, current_xp)"""
-        try:
-            async with aiosqlite.connect(self.db_path) as db:
-                async with db.execute(
-                    'SELECT level, xp FROM levels WHERE guild_id = ? AND user_id = ?',
-                    (guild_id, user_id)
-                ) as cursor:
-                    result = await cursor.fetchone()
-                    current_level = result[0] if result else 1
-                    current_xp = result[1] if result else 0
-
-                current_xp += xp_amount
-                leveled_up = False
+    async def get_guild_config(self, guild_id: str) -> Dict:
+        return (await self.get_config(guild_id)).as_dict()
 
-                while True:
-                    xp_needed = int(100 * (current_level ** 1.5))
-                    if current_xp >= xp_needed:
-                        current_xp -= xp_needed
-                        current_level += 1
-                        leveled_up = True
-                    else:
-                        break
 
-                await db.execute('''
-                    INSERT INTO levels (guild_id, user_id, xp, level)
-                    VALUES (?, ?, ?, ?)
-                    ON CONFLICT(guild_id, user_id) 
-                    DO UPDATE SET xp = ?, level = ?
-                ''', (guild_id, user_id, current_xp, current_level, current_xp, current_level))
-                await db.commit()
+    async def add_xp(self, guild_id: str, user_id: str, xp_amount: int) -> tuple[bool, int, int]:
+        """Add XP to user and return (leveled_up, new_level, current_xp)
 
-                return leveled_up, current_level, current_xp
+        The change is applied to the in-memory ledger immediately and written
+        to disk by the next flush_xp().
+        """
+        try:
+            await self._load_ledger_entry(guild_id, user_id)
+            result = self.ledger.apply((guild_id, user_id), xp_amount)
         except Exception as e:
             logger.error(f"Failed to add XP: {e}")
             raise DatabaseError(f"XP addition failed: {str(e)}")
 
+        if self.ledger.should_flush and not self._flush_lock.locked():
+            await self.flush_xp()
+        return result
+
 
     async def migrate_roles(self, guild_id: str, roles_data: dict):
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self.pool.writer() as db:
             for level, role_id in roles_data.items():
                 await db.execute('''
                     INSERT INTO level_roles (guild_id, level, role_id)
@@ -132,7 +222,7 @@ class LevelDatabase:
             await db.commit()
 
     async def migrate_config(self, guild_id: str, config_data: dict):
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self.pool.writer() as db:
             await db.execute('''
                 INSERT INTO guild_config 
                 (guild_id, xp_cooldown, xp_amount, level_channel_id, is_blocked)
@@ -151,22 +241,92 @@ class LevelDatabase:
                 guild_id in config_data.get('blocked_guilds', [])
             ))
             await db.commit()
+        self.invalidate_config(guild_id)
 
     async def get_top_users(self, guild_id: str, limit: int = 10) -> List[tuple]:
+        return await self.get_page(guild_id, 0, limit)
+
+    async def get_page(self, guild_id: str, offset: int = 0, limit: int = 10) -> List[tuple]:
+        """Return (user_id, level, xp) rows in leaderboard order, walked off idx_levels_rank"""
         try:
-            async with aiosqlite.connect(self.db_path) as db:
+            await self.flush_xp()
+            async with self.pool.reader() as db:
                 async with db.execute(
-                    'SELECT user_id, level, xp FROM levels WHERE guild_id = ? ORDER BY level DESC, xp DESC LIMIT ?',
-                    (guild_id, limit)
+                    '''SELECT user_id, level, xp FROM levels WHERE guild_id = ?
+                       ORDER BY level DESC, xp DESC, user_id LIMIT ? OFFSET ?''',
+                    (guild_id, limit, max(0, offset))
                 ) as cursor:
                     return await cursor.fetchall()
         except Exception as e:
-            logger.error(f"Failed to get top users: {e}")
+            logger.error(f"Failed to get leaderboard page: {e}")
             raise DatabaseError(f"Leaderboard retrieval failed: {str(e)}")
 
+    async def _get_position(self, db, guild_id: str, user_id: str) -> Optional[Tuple[int, int]]:
+        """Return (users strictly ahead, users tied ahead by user_id order) or None without a row"""
+        async with db.execute(
+            'SELECT level, xp FROM levels WHERE guild_id = ? AND user_id = ?',
+            (guild_id, user_id)
+        ) as cursor:
+            row = await cursor.fetchone()
+        if not row:
+            return None
+        level, xp = row
+        async with db.execute(
+            '''SELECT
+                (SELECT COUNT(*) FROM levels WHERE guild_id = ? AND (level, xp) > (?, ?)),
+                (SELECT COUNT(*) FROM levels WHERE guild_id = ? AND level = ? AND xp = ? AND user_id < ?)''',
+            (guild_id, level, xp, guild_id, level, xp, user_id)
+        ) as cursor:
+            ahead, tied_ahead = await cursor.fetchone()
+        return ahead, tied_ahead
+
+    async def get_user_rank(self, guild_id: str, user_id: str) -> Optional[Dict]:
+        """Return {"rank", "total"} for a user, or None if they have no XP row
+
+        Users with equal level and XP share a rank.
+        """
+        try:
+            await self.flush_xp()
+            async with self.pool.reader() as db:
+                position = await self._get_position(db, guild_id, user_id)
+                if position is None:
+                    return None
+                async with db.execute('SELECT COUNT(*) FROM levels WHERE guild_id = ?', (guild_id,)) as cursor:
+                    total = (await cursor.fetchone())[0]
+            rank = position[0] + 1
+            return {"rank": rank, "total": total}
+        except Exception as e:
+            logger.error(f"Failed to get user rank: {e}")
+            raise DatabaseError(f"Rank retrieval failed: {str(e)}")
+
+    async def get_rank_window(self, guild_id: str, user_id: str, radius: int = 2) -> List[tuple]:
+        """Return (position, user_id, level, xp) rows for up to ``radius`` users either side of a user"""
+        try:
+            await self.flush_xp()
+            async with self.pool.reader() as db:
+                position = await self._get_position(db, guild_id, user_id)
+                if position is None:
+                    return []
+                index = sum(position)
+                offset = max(0, index - radius)
+                async with db.execute(
+                    '''SELECT user_id, level, xp FROM levels WHERE guild_id = ?
+                       ORDER BY level DESC, xp DESC, user_id LIMIT ? OFFSET ?''',
+                    (guild_id, index - offset + radius + 1, offset)
+                ) as cursor:
+                    rows = await cursor.fetchall()
+            return [(offset + i + 1, *row) for i, row in enumerate(rows)]
+        except Exception as e:
+            logger.error(f"Failed to get rank window: {e}")
+            raise DatabaseError(f"Rank window retrieval failed: {str(e)}")
+
     async def reset_user_level(self, guild_id: str, user_id: str):
         try:
-            async with aiosqlite.connect(self.db_path) as db:
+            # Drop pending XP first so a later flush can't resurrect it
+            if (guild_id, user_id) in self.ledger:
+                self.ledger.set((guild_id, user_id), 0, 1)
+            await self.flush_xp()
+            async with self.pool.writer() as db:
                 await db.execute(
                     'UPDATE levels SET xp = 0, level = 1 WHERE guild_id = ? AND user_id = ?',
                     (guild_id, user_id)
@@ -179,7 +339,7 @@ class LevelDatabase:
 
     async def set_level_role(self, guild_id: str, level: int, role_id: int):
         try:
-            async with aiosqlite.connect(self.db_path) as db:
+            async with self.pool.writer() as db:
                 await db.execute('''
                     INSERT INTO level_roles (guild_id, level, role_id)
                     VALUES (?, ?, ?)
@@ -192,7 +352,7 @@ class LevelDatabase:
 
     async def get_level_roles(self, guild_id: str) -> List[tuple]:
         try:
-            async with aiosqlite.connect(self.db_path) as db:
+            async with self.pool.reader() as db:
                 async with db.execute(
                     'SELECT level, role_id FROM level_roles WHERE guild_id = ? ORDER BY level',
                     (guild_id,)
@@ -205,7 +365,7 @@ class LevelDatabase:
 
 
     async def update_guild_config(self, guild_id: str, **kwargs):
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self.pool.writer() as db:
             fields = ', '.join(f'{k} = ?' for k in kwargs.keys())
             values = tuple(kwargs.values()) + (guild_id,)
             await db.execute(
@@ -213,6 +373,7 @@ class LevelDatabase:
                 values
             )
             await db.commit()
+        self.invalidate_config(guild_id)
 
     async def update_xp_settings(self, guild_id: str, cooldown: int = None, amount: int = None):
         try:
@@ -228,13 +389,14 @@ class LevelDatabase:
                     (amount, guild_id)
                 ))
             await self.execute_transaction(queries)
+            self.invalidate_config(guild_id)
         except Exception as e:
             logger.error(f"Failed to update XP settings: {e}")
             raise DatabaseError(f"XP settings update failed: {str(e)}")
 
     async def toggle_guild_block(self, guild_id: str) -> bool:
         try:
-            async with aiosqlite.connect(self.db_path) as db:
+            async with self.pool.writer() as db:
                 async with db.execute(
                     'SELECT is_blocked FROM guild_config WHERE guild_id = ?',
                     (guild_id,)
@@ -249,20 +411,22 @@ class LevelDatabase:
                     ON CONFLICT(guild_id) DO UPDATE SET is_blocked = ?
                 ''', (guild_id, new_status, new_status))
                 await db.commit()
-                return new_status
+            self.invalidate_config(guild_id)
+            return new_status
         except Exception as e:
             logger.error(f"Failed to toggle guild block: {e}")
             raise DatabaseError(f"Guild block toggle failed: {str(e)}")
 
     async def set_level_channel(self, guild_id: str, channel_id: int):
         try:
-            async with aiosqlite.connect(self.db_path) as db:
+            async with self.pool.writer() as db:
                 await db.execute('''
                     INSERT INTO guild_config (guild_id, level_channel_id)
                     VALUES (?, ?)
                     ON CONFLICT(guild_id) DO UPDATE SET level_channel_id = ?
                 ''', (guild_id, channel_id, channel_id))
                 await db.commit()
+            self.invalidate_config(guild_id)
         except Exception as e:
             logger.error(f"Failed to set level channel: {e}")
             raise DatabaseError(f"Channel setting failed: {str(e)}")
@@ -270,7 +434,7 @@ class LevelDatabase:
 
     async def toggle_restricted_entity(self, guild_id: str, entity_id: str, entity_type: str) -> bool:
         try:
-            async with aiosqlite.connect(self.db_path) as db:
+            async with self.pool.writer() as db:
                 async with db.execute(
                     'SELECT 1 FROM restricted_entities WHERE guild_id = ? AND entity_id = ? AND entity_type = ?',
                     (guild_id, entity_id, entity_type)
@@ -291,60 +455,42 @@ class LevelDatabase:
                     result = True
                     
                 await db.commit()
-                return result
+            config = self._configs.get(guild_id)
+            if config is not None:
+                config.set_restricted(entity_id, entity_type, result)
+            else:
+                self.invalidate_config(guild_id)
+            return result
         except Exception as e:
             logger.error(f"Failed to toggle restricted entity: {e}")
             raise DatabaseError(f"Entity restriction toggle failed: {str(e)}")
 
+    async def is_entity_restricted(self, guild_id: str, entity_id: str, entity_type: str) -> bool:
+        return (await self.get_config(guild_id)).is_restricted(entity_id, entity_type)
+
     async def bulk_add_xp(self, guild_id: str, user_xp_mapping: dict) -> List[tuple]:
         """
         Bulk add XP to multiple users and return list of (user_id, leveled_up, new_level)
         """
         try:
+            await self._load_ledger_entries(guild_id, list(user_xp_mapping))
             results = []
-            async with aiosqlite.connect(self.db_path) as db:
-                for user_id, xp_amount in user_xp_mapping.items():
-                    # Get current level and XP
-                    async with db.execute(
-                        'SELECT level, xp FROM levels WHERE guild_id = ? AND user_id = ?',
-                        (guild_id, user_id)
-                    ) as cursor:
-                        result = await cursor.fetchone()
-                        current_level = result[0] if result else 1
-                        current_xp = result[1] if result else 0
-
-                    # Calculate new level and XP
-                    new_xp = current_xp + xp_amount
-                    leveled_up = False
-                    
-                    while True:
-                        xp_needed = int(100 * (current_level ** 1.5))
-                        if new_xp >= xp_needed:
-                            new_xp -= xp_needed
-                            current_level += 1
-                            leveled_up = True
-                        else:
-                            break
-
-                    # Update database
-                    await db.execute('''
-                        INSERT INTO levels (guild_id, user_id, xp, level)
-                        VALUES (?, ?, ?, ?)
-                        ON CONFLICT(guild_id, user_id) 
-                        DO UPDATE SET xp = ?, level = ?
-                    ''', (guild_id, user_id, new_xp, current_level, new_xp, current_level))
-                    
-                    results.append((user_id, leveled_up, current_level))
-                
-                await db.commit()
-                return results
+            for user_id, xp_amount in user_xp_mapping.items():
+                leveled_up, new_level, _ = self.ledger.apply((guild_id, user_id), xp_amount)
+                results.append((user_id, leveled_up, new_level))
+
+            # One executemany for the whole batch
+            await self.flush_xp()
+            return results
+        except DatabaseError:
+            raise
         except Exception as e:
             logger.error(f"Failed to bulk add XP: {e}")
             raise DatabaseError(f"Bulk XP addition failed: {str(e)}")
 
     async def set_xp_multiplier(self, guild_id: str, multiplier_type: str, target_id: str, multiplier: float, duration_hours: int = None):
         try:
-            async with aiosqlite.connect(self.db_path) as db:
+            async with self.pool.writer() as db:
                 expires_at = None
                 if duration_hours:
                     expires_at = datetime.now() + timedelta(hours=duration_hours)
@@ -356,45 +502,75 @@ class LevelDatabase:
                     DO UPDATE SET multiplier = ?, expires_at = ?
                 ''', (guild_id, multiplier_type, target_id, multiplier, expires_at, multiplier, expires_at))
                 await db.commit()
+            self.invalidate_multipliers(guild_id)
         except Exception as e:
             logger.error(f"Failed to set XP multiplier: {e}")
             raise DatabaseError(f"XP multiplier setting failed: {str(e)}")
 
     async def get_active_multipliers(self, guild_id: str) -> List[tuple]:
+        """Return (multiplier_type, target_id, multiplier, expires_at) rows with expires_at parsed"""
         try:
-            async with aiosqlite.connect(self.db_path) as db:
+            async with self.pool.reader() as db:
                 current_time = datetime.now()
                 async with db.execute('''
                     SELECT multiplier_type, target_id, multiplier, expires_at 
                     FROM xp_multipliers 
                     WHERE guild_id = ? AND (expires_at IS NULL OR expires_at > ?)
                 ''', (guild_id, current_time)) as cursor:
-                    return await cursor.fetchall()
+                    rows = await cursor.fetchall()
+            return [
+                (m_type, target_id, multiplier, datetime.fromisoformat(expires_at) if isinstance(expires_at, str) else expires_at)
+                for m_type, target_id, multiplier, expires_at in rows
+            ]
         except Exception as e:
             logger.error(f"Failed to get active multipliers: {e}")
             raise DatabaseError(f"Multiplier retrieval failed: {str(e)}")
 
+    async def get_multipliers(self, guild_id: str) -> GuildMultipliers:
+        """Return the cached active multipliers for a guild, loading them on first use"""
+        multipliers = self._multipliers.get(guild_id)
+        if multipliers is not None:
+            return multipliers
+
+        generation = self._multiplier_generations.get(guild_id, 0)
+        multipliers = GuildMultipliers()
+        for m_type, target_id, multiplier, expires_at in await self.get_active_multipliers(guild_id):
+            multipliers.add(m_type, target_id, multiplier, expires_at)
+
+        if self._multiplier_generations.get(guild_id, 0) == generation:
+            self._multipliers[guild_id] = multipliers
+        return multipliers
+
+    def invalidate_multipliers(self, guild_id: str):
+        """Drop a guild's cached multipliers so the next read reloads them"""
+        self._multipliers.pop(guild_id, None)
+        self._multiplier_generations[guild_id] = self._multiplier_generations.get(guild_id, 0) + 1
+
     async def create_xp_event(self, guild_id: str, event_name: str, multiplier: float, duration_hours: int, roles: List[int] = None):
         try:
-            async with aiosqlite.connect(self.db_path) as db:
+            async with self.pool.writer() as db:
                 end_time = datetime.now() + timedelta(hours=duration_hours)
                 
-                # Create event multiplier
-                await db.execute('''
-                    INSERT INTO xp_multipliers (guild_id, multiplier_type, target_id, multiplier, expires_at)
-                    VALUES (?, 'event', ?, ?, ?)
-                ''', (guild_id, event_name, multiplier, end_time))
-                
-                # If specific roles are targeted, create role multipliers
                 if roles:
-                    for role_id in roles:
-                        await db.execute('''
-                            INSERT INTO xp_multipliers (guild_id, multiplier_type, target_id, multiplier, expires_at)
-                            VALUES (?, 'role', ?, ?, ?)
-                        ''', (guild_id, str(role_id), multiplier, end_time))
+                    # Event limited to specific roles
+                    await db.executemany('''
+                        INSERT INTO xp_multipliers (guild_id, multiplier_type, target_id, multiplier, expires_at)
+                        VALUES (?, 'role', ?, ?, ?)
+                        ON CONFLICT(guild_id, multiplier_type, target_id)
+                        DO UPDATE SET multiplier = excluded.multiplier, expires_at = excluded.expires_at
+                    ''', [(guild_id, str(role_id), multiplier, end_time) for role_id in roles])
+                else:
+                    # Server-wide event multiplier
+                    await db.execute('''
+                        INSERT INTO xp_multipliers (guild_id, multiplier_type, target_id, multiplier, expires_at)
+                        VALUES (?, 'event', ?, ?, ?)
+                        ON CONFLICT(guild_id, multiplier_type, target_id)
+                        DO UPDATE SET multiplier = excluded.multiplier, expires_at = excluded.expires_at
+                    ''', (guild_id, event_name, multiplier, end_time))
                 
                 await db.commit()
-                return end_time
+            self.invalidate_multipliers(guild_id)
+            return end_time
         except Exception as e:
             logger.error(f"Failed to create XP event: {e}")
             raise DatabaseError(f"XP event creation failed: {str(e)}")
@@ -0,0 +1,417 @@
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import aiosqlite
+
+from .achievements import METRIC_COLUMNS, AchievementCatalog
+from .db_manager import DatabaseError
+from .lunacy_schema import LUNACY_DB_PATH
+from .perk_bonuses import BonusCache, PerkBonuses
+from .pool import ConnectionPool
+
+logger = logging.getLogger(__name__)
+
+
+class EconomyError(DatabaseError):
+    """A rejected economy operation; the message is safe to show to the user"""
+    pass
+
+
+class EconomyDatabase:
+    """Async access to lunacy.db.
+
+    Every operation that changes balances runs as one transaction on the
+    pool's writer, so checks (funds, cooldowns, stock) and the writes
+    they guard can't interleave with another command.
+    """
+
+    def __init__(self, db_path: str = LUNACY_DB_PATH, readers: int = 4, bonus_cache_size: int = 10000):
+        self.db_path = db_path
+        self.pool = ConnectionPool(db_path, readers=readers)
+        self.bonuses = BonusCache(bonus_cache_size)
+        self._catalog: Optional[AchievementCatalog] = None
+
+    async def connect(self):
+        """Open the shared connection pool"""
+        await self.pool.open()
+
+    async def close(self):
+        """Close the shared connection pool"""
+        await self.pool.close()
+
+    # ------------------------------------------------------------------ helpers
+
+    @staticmethod
+    async def _ensure_user(db: aiosqlite.Connection, user_id: str):
+        await db.execute('INSERT OR IGNORE INTO users (user_id, balance, last_daily, streak) VALUES (?, 0, NULL, 0)', (user_id,))
+
+    @staticmethod
+    async def _fetch_balance(db: aiosqlite.Connection, user_id: str) -> int:
+        async with db.execute('SELECT balance FROM users WHERE user_id = ?', (user_id,)) as cursor:
+            row = await cursor.fetchone()
+        return row[0] if row else 0
+
+    async def _load_bonuses(self, db: aiosqlite.Connection, user_id: str) -> PerkBonuses:
+        """Return the user's cached perk vector, summing it from inventory on a miss"""
+        bonuses = self.bonuses.get(user_id)
+        if bonuses is not None:
+            return bonuses
+
+        version = self.bonuses.version
+        async with db.execute('''
+            SELECT s.perk_type, SUM(s.perk_value)
+            FROM inventory i
+            JOIN shop s ON i.item_id = s.item_id
+            WHERE i.user_id = ?
+            GROUP BY s.perk_type
+        ''', (user_id,)) as cursor:
+            bonuses = PerkBonuses.from_rows(await cursor.fetchall())
+        self.bonuses.put(user_id, bonuses, version)
+        return bonuses
+
+    async def _get_catalog(self, db: aiosqlite.Connection) -> AchievementCatalog:
+        if self._catalog is None:
+            async with db.execute('SELECT id, metric, requirement, reward FROM achievements') as cursor:
+                self._catalog = AchievementCatalog(await cursor.fetchall())
+        return self._catalog
+
+    async def _award_achievements(self, db: aiosqlite.Connection, user_id: str, *metrics: str) -> int:
+        """Complete every unearned achievement the user's current ``metrics`` reach and pay the rewards.
+
+        One query reads the metric values together with the completed set;
+        thresholds are then bisected in memory. Runs inside the caller's
+        transaction and returns the total reward.
+        """
+        catalog = await self._get_catalog(db)
+        columns = ', '.join(f'COALESCE({METRIC_COLUMNS[metric]}, 0)' for metric in metrics)
+        async with db.execute(f'''
+            SELECT {columns},
+                   (SELECT group_concat(achievement_id) FROM user_achievements WHERE user_achievements.user_id = users.user_id)
+            FROM users WHERE user_id = ?
+        ''', (user_id,)) as cursor:
+            row = await cursor.fetchone()
+        if row is None:
+            return 0
+
+        values = dict(zip(metrics, row))
+        completed = [int(ach_id) for ach_id in row[-1].split(',')] if row[-1] else []
+        earned = catalog.evaluate(values, completed)
+        if not earned:
+            return 0
+
+        completed_at = datetime.now().isoformat()
+        await db.executemany(
+            'INSERT INTO user_achievements (user_id, achievement_id, completed_at) VALUES (?, ?, ?)',
+            [(user_id, ach_id, completed_at) for ach_id, _ in earned]
+        )
+        total = sum(reward for _, reward in earned)
+        await db.execute('UPDATE users SET balance = balance + ? WHERE user_id = ?', (total, user_id))
+        return total
+
+    # -------------------------------------------------------------------- reads
+
+    async def get_balance(self, user_id: str) -> int:
+        async with self.pool.reader() as db:
+            return await self._fetch_balance(db, user_id)
+
+    async def get_bonuses(self, user_id: str) -> PerkBonuses:
+        bonuses = self.bonuses.get(user_id)
+        if bonuses is not None:
+            return bonuses
+        async with self.pool.reader() as db:
+            return await self._load_bonuses(db, user_id)
+
+    async def get_user_bonus(self, user_id: str, bonus_type: str) -> float:
+        """Sum of perk values from owned items matching ``bonus_type`` or 'all_bonus'"""
+        return (await self.get_bonuses(user_id)).get(bonus_type)
+
+    async def get_leaderboard(self, limit: int = 10) -> List[Tuple[str, int]]:
+        async with self.pool.reader() as db:
+            async with db.execute('SELECT user_id, balance FROM users ORDER BY balance DESC LIMIT ?', (limit,)) as cursor:
+                return await cursor.fetchall()
+
+    async def get_achievements(self, user_id: str) -> List[Tuple[str, str, int, Optional[str]]]:
+        """Every achievement as (name, description, reward, completed_at or None)"""
+        async with self.pool.reader() as db:
+            async with db.execute('''
+                SELECT a.name, a.description, a.reward, ua.completed_at
+                FROM achievements a
+                LEFT JOIN user_achievements ua
+                ON a.id = ua.achievement_id AND ua.user_id = ?
+            ''', (user_id,)) as cursor:
+                return await cursor.fetchall()
+
+    async def get_shop_items(self) -> Tuple[List[tuple], Optional[str]]:
+        """Return (items, next_rotation), limited items first then by price"""
+        async with self.pool.reader() as db:
+            async with db.execute('''
+                SELECT item_id, name, price, description, perk_type, perk_value, limited, available_until
+                FROM shop ORDER BY limited DESC, price ASC
+            ''') as cursor:
+                items = await cursor.fetchall()
+        next_rotation = next((item[7] for item in items if item[6]), None)
+        return items, next_rotation
+
+    async def get_inventory(self, user_id: str) -> List[Tuple[str, int, str]]:
+        async with self.pool.reader() as db:
+            async with db.execute('''
+                SELECT s.name, i.quantity, s.description
+                FROM inventory i
+                JOIN shop s ON i.item_id = s.item_id
+                WHERE i.user_id = ?
+            ''', (user_id,)) as cursor:
+                return await cursor.fetchall()
+
+    # ------------------------------------------------------------------- writes
+
+    async def claim_daily(self, user_id: str, base_amount: int) -> Dict:
+        """Claim the daily reward in one transaction.
+
+        Returns ``{"claimed": False, "time_left": timedelta}`` while on
+        cooldown, otherwise the streak, bonuses, paid amount and
+        achievement rewards.
+        """
+        now = datetime.now()
+        try:
+            async with self.pool.writer() as db:
+                await db.execute('BEGIN')
+                await self._ensure_user(db, user_id)
+                async with db.execute('SELECT last_daily, streak FROM users WHERE user_id = ?', (user_id,)) as cursor:
+                    last_daily, streak = await cursor.fetchone()
+
+                if last_daily:
+                    time_diff = now - datetime.fromisoformat(last_daily)
+                    if time_diff < timedelta(days=1):
+                        await db.rollback()
+                        return {"claimed": False, "time_left": timedelta(days=1) - time_diff}
+                    # Reset streak if more than 48 hours passed
+                    streak = 0 if time_diff > timedelta(days=2) else (streak or 0) + 1
+                else:
+                    streak = 1
+
+                streak_bonus = min(streak * 0.1, 1.0)  # Cap bonus at 100%
+                item_bonus = (await self._load_bonuses(db, user_id)).get("daily_bonus")
+                amount = int(base_amount * (1 + streak_bonus) * (1 + item_bonus))
+
+                await db.execute('''
+                    UPDATE users SET balance = balance + ?, last_daily = ?, streak = ?
+                    WHERE user_id = ?
+                ''', (amount, now.isoformat(), streak, user_id))
+                rewards = await self._award_achievements(db, user_id, 'streak', 'balance')
+                await db.commit()
+        except Exception as e:
+            logger.error(f"Failed to claim daily for {user_id}: {e}")
+            raise DatabaseError(f"Daily claim failed: {str(e)}")
+
+        return {
+            "claimed": True,
+            "streak": streak,
+            "streak_bonus": streak_bonus,
+            "item_bonus": item_bonus,
+            "amount": amount,
+            "achievement_rewards": rewards,
+        }
+
+    async def record_work(self, user_id: str, base_amount: int) -> Dict:
+        """Pay a work shift with the user's work bonus and check work achievements"""
+        try:
+            async with self.pool.writer() as db:
+                await db.execute('BEGIN')
+                await self._ensure_user(db, user_id)
+                work_bonus = (await self._load_bonuses(db, user_id)).get("work_bonus")
+                amount = int(base_amount * (1 + work_bonus))
+
+                await db.execute('''
+                    UPDATE users
+                    SET work_count = COALESCE(work_count, 0) + 1,
+                        work_earnings = COALESCE(work_earnings, 0) + ?,
+                        balance = balance + ?
+                    WHERE user_id = ?
+                ''', (amount, amount, user_id))
+                rewards = await self._award_achievements(db, user_id, 'work_count', 'work_earnings', 'balance')
+                await db.commit()
+        except Exception as e:
+            logger.error(f"Failed to record work for {user_id}: {e}")
+            raise DatabaseError(f"Work payout failed: {str(e)}")
+
+        return {"work_bonus": work_bonus, "amount": amount, "achievement_rewards": rewards}
+
+    async def purchase(self, user_id: str, item_id: int, quantity: int = 1) -> Dict:
+        """Buy ``quantity`` of a shop item in one transaction.
+
+        Raises EconomyError for an unknown item, a multi-buy of a limited
+        item or insufficient funds.
+        """
+        async with self.pool.writer() as db:
+            try:
+                await db.execute('BEGIN')
+                async with db.execute(
+                    'SELECT name, price, limited, perk_type, perk_value FROM shop WHERE item_id = ?', (item_id,)
+                ) as cursor:
+                    item = await cursor.fetchone()
+                if not item:
+                    raise EconomyError("Invalid item ID!")
+
+                name, price, is_limited, perk_type, perk_value = item
+                if is_limited and quantity > 1:
+                    raise EconomyError("Limited items can only be purchased one at a time!")
+
+                total_cost = price * quantity
+                await self._ensure_user(db, user_id)
+                if await self._fetch_balance(db, user_id) < total_cost:
+                    raise EconomyError("You don't have enough Luna!")
+
+                # Perks count once per distinct item, so only a first copy changes the bonus
+                async with db.execute('SELECT 1 FROM inventory WHERE user_id = ? AND item_id = ?', (user_id, item_id)) as cursor:
+                    newly_owned = await cursor.fetchone() is None
+
+                await db.execute('''
+                    UPDATE users
+                    SET balance = balance - ?,
+                        items_bought = COALESCE(items_bought, 0) + ?,
+                        limited_items_bought = CASE WHEN ? THEN COALESCE(limited_items_bought, 0) + 1 ELSE limited_items_bought END,
+                        total_spent = COALESCE(total_spent, 0) + ?
+                    WHERE user_id = ?
+                ''', (total_cost, quantity, is_limited, total_cost, user_id))
+                await db.execute('''
+                    INSERT INTO inventory (user_id, item_id, quantity)
+                    VALUES (?, ?, ?)
+                    ON CONFLICT(user_id, item_id)
+                    DO UPDATE SET quantity = quantity + excluded.quantity
+                ''', (user_id, item_id, quantity))
+
+                rewards = await self._award_achievements(
+                    db, user_id, 'items_bought', 'limited_items_bought', 'total_spent', 'unique_items')
+                await db.commit()
+                if newly_owned:
+                    self.bonuses.add_item(user_id, perk_type, perk_value)
+            except EconomyError:
+                await db.rollback()
+                raise
+            except Exception as e:
+                await db.rollback()
+                logger.error(f"Failed to buy item {item_id} for {user_id}: {e}")
+                raise DatabaseError(f"Purchase failed: {str(e)}")
+
+        return {"name": name, "total_cost": total_cost, "achievement_rewards": rewards}
+
+    async def gamble(self, user_id: str, amount: int, roll: float) -> Dict:
+        """Settle a coinflip bet; ``roll`` is a uniform [0, 1) draw compared against the win chance.
+
+        Funds are re-checked inside the transaction so a balance spent
+        while the coin was flipping can't go negative.
+        """
+        async with self.pool.writer() as db:
+            try:
+                await db.execute('BEGIN')
+                await self._ensure_user(db, user_id)
+                if await self._fetch_balance(db, user_id) < amount:
+                    raise EconomyError("You don't have enough Luna!")
+
+                gamble_bonus = (await self._load_bonuses(db, user_id)).get("gamble_bonus")
+                won = roll < 0.5 + (gamble_bonus / 2)  # Base 50% + bonus
+                # A win credits double the bet, a loss debits it
+                delta = amount * 2 if won else -amount
+
+                await db.execute('''
+                    UPDATE users
+                    SET balance = balance + ?,
+                        total_gambles = COALESCE(total_gambles, 0) + 1,
+                        gamble_wins = COALESCE(gamble_wins, 0) + ?
+                    WHERE user_id = ?
+                ''', (delta, 1 if won else 0, user_id))
+
+                rewards = await self._award_achievements(db, user_id, 'gamble_wins', 'total_gambles', 'balance')
+                await db.commit()
+            except EconomyError:
+                await db.rollback()
+                raise
+            except Exception as e:
+                await db.rollback()
+                logger.error(f"Failed to settle gamble for {user_id}: {e}")
+                raise DatabaseError(f"Gamble failed: {str(e)}")
+
+        return {"won": won, "gamble_bonus": gamble_bonus, "winnings": amount * 2 if won else 0, "achievement_rewards": rewards}
+
+    async def trade(self, sender_id: str, target_id: str, amount: int) -> int:
+        """Move ``amount`` from sender to target and return the sender's achievement rewards"""
+        async with self.pool.writer() as db:
+            try:
+                await db.execute('BEGIN')
+                await self._ensure_user(db, sender_id)
+                await self._ensure_user(db, target_id)
+                if await self._fetch_balance(db, sender_id) < amount:
+                    raise EconomyError("You don't have enough Luna!")
+
+                await db.execute('''
+                    UPDATE users
+                    SET balance = balance - ?,
+                        trades_completed = COALESCE(trades_completed, 0) + 1
+                    WHERE user_id = ?
+                ''', (amount, sender_id))
+                await db.execute('UPDATE users SET balance = balance + ? WHERE user_id = ?', (amount, target_id))
+
+                rewards = await self._award_achievements(db, sender_id, 'trades')
+                await self._award_achievements(db, target_id, 'balance')
+                await db.commit()
+            except EconomyError:
+                await db.rollback()
+                raise
+            except Exception as e:
+                await db.rollback()
+                logger.error(f"Failed to trade {amount} from {sender_id} to {target_id}: {e}")
+                raise DatabaseError(f"Trade failed: {str(e)}")
+        return rewards
+
+    # --------------------------------------------------------------------- shop
+
+    async def initialize_shop(self, default_items: Sequence[tuple]):
+        """Stock the regular items if the shop has none"""
+        async with self.pool.writer() as db:
+            async with db.execute('SELECT COUNT(*) FROM shop WHERE limited = FALSE') as cursor:
+                count = (await cursor.fetchone())[0]
+            if count == 0:
+                await db.executemany('''
+                    INSERT INTO shop (name, price, description, perk_type, perk_value, limited)
+                    VALUES (?, ?, ?, ?, ?, FALSE)
+                ''', default_items)
+                await db.commit()
+
+    async def rotate_limited_items(self, items: Sequence[tuple], available_until: datetime):
+        """Replace the limited items with ``items`` (name, price, description, limited, perk_type, perk_value)
+
+        Owners of the removed items lose their perks, so their cached
+        bonus vectors are dropped.
+        """
+        async with self.pool.writer() as db:
+            try:
+                await db.execute('BEGIN')
+                # Limited owners, plus rows left by earlier rotations whose item_id a new item may reuse
+                async with db.execute('''
+                    SELECT DISTINCT user_id FROM inventory
+                    WHERE item_id NOT IN (SELECT item_id FROM shop WHERE limited = FALSE)
+                ''') as cursor:
+                    owners = [row[0] for row in await cursor.fetchall()]
+                await db.execute('DELETE FROM shop WHERE limited = TRUE')
+                await db.executemany('''
+                    INSERT INTO shop (name, price, description, limited, available_until, perk_type, perk_value)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''', [(name, price, desc, limited, available_until.isoformat(), perk_type, perk_value)
+                      for name, price, desc, limited, perk_type, perk_value in items])
+                await db.commit()
+            except Exception as e:
+                await db.rollback()
+                logger.error(f"Failed to rotate limited items: {e}")
+                raise DatabaseError(f"Shop rotation failed: {str(e)}")
+        self.bonuses.invalidate(owners)
+
+    async def reset_shop_and_version(self):
+        """Clear the shop and the recorded schema version so every migration replays"""
+        async with self.pool.writer() as db:
+            await db.execute('BEGIN')
+            await db.execute('DELETE FROM shop')
+            await db.execute('DELETE FROM db_version')
+            await db.commit()
+        self.bonuses.clear()
+        self._catalog = None
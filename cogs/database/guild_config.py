@@ -0,0 +1,50 @@
+from typing import Dict, Optional, Set
+
+
+class GuildConfig:
+    """XP settings and restricted users/channels for one guild, held in memory."""
+
+    __slots__ = (
+        'xp_cooldown',
+        'xp_amount',
+        'level_channel_id',
+        'is_blocked',
+        'restricted_users',
+        'restricted_channels',
+    )
+
+    def __init__(
+        self,
+        xp_cooldown: int = 10,
+        xp_amount: int = 10,
+        level_channel_id: Optional[int] = None,
+        is_blocked: bool = False,
+        restricted_users: Optional[Set[str]] = None,
+        restricted_channels: Optional[Set[str]] = None,
+    ):
+        self.xp_cooldown = xp_cooldown
+        self.xp_amount = xp_amount
+        self.level_channel_id = level_channel_id
+        self.is_blocked = is_blocked
+        self.restricted_users = restricted_users if restricted_users is not None else set()
+        self.restricted_channels = restricted_channels if restricted_channels is not None else set()
+
+    def _restricted_set(self, entity_type: str) -> Set[str]:
+        return self.restricted_users if entity_type == 'user' else self.restricted_channels
+
+    def is_restricted(self, entity_id: str, entity_type: str) -> bool:
+        return entity_id in self._restricted_set(entity_type)
+
+    def set_restricted(self, entity_id: str, entity_type: str, restricted: bool):
+        if restricted:
+            self._restricted_set(entity_type).add(entity_id)
+        else:
+            self._restricted_set(entity_type).discard(entity_id)
+
+    def as_dict(self) -> Dict:
+        return {
+            "xp_cooldown": self.xp_cooldown,
+            "xp_amount": self.xp_amount,
+            "level_channel_id": self.level_channel_id,
+            "is_blocked": self.is_blocked,
+        }
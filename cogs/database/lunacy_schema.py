@@ -0,0 +1,166 @@
+from typing import List, Sequence
+
+import aiosqlite
+
+from .migrations import Migration, migrate, set_pragma
+
+LUNACY_DB_PATH = 'cogs/data/lunacy.db'
+
+
+def lunacy_migrations(default_items: Sequence[tuple], default_achievements: Sequence[tuple]) -> List[Migration]:
+    """Migrations for lunacy.db; versions 1-5 mirror the original hand-rolled ladder
+
+    ``default_achievements`` rows are (name, description, reward, requirement, metric).
+    """
+    achievement_rows = [achievement[:4] for achievement in default_achievements]
+
+    async def seed_achievements(db: aiosqlite.Connection):
+        await db.executemany('''INSERT OR IGNORE INTO achievements (name, description, reward, requirement)
+                                VALUES (?, ?, ?, ?)''', achievement_rows)
+
+    async def rebuild_inventory(db: aiosqlite.Connection):
+        await db.execute('''CREATE TABLE IF NOT EXISTS inventory_new
+                    (user_id TEXT,
+                    item_id INTEGER,
+                    quantity INTEGER,
+                    acquired_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    FOREIGN KEY(user_id) REFERENCES users(user_id),
+                    FOREIGN KEY(item_id) REFERENCES shop(item_id),
+                    UNIQUE(user_id, item_id))''')
+
+        # Migrate existing data if inventory table exists
+        async with db.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='inventory'") as cursor:
+            has_inventory = await cursor.fetchone()
+        if has_inventory:
+            await db.execute('''INSERT OR REPLACE INTO inventory_new (user_id, item_id, quantity)
+                                SELECT user_id, item_id, quantity FROM inventory''')
+            await db.execute('DROP TABLE inventory')
+
+        await db.execute('ALTER TABLE inventory_new RENAME TO inventory')
+
+    async def add_perk_columns(db: aiosqlite.Connection):
+        async with db.execute("PRAGMA table_info(shop)") as cursor:
+            columns = [column[1] for column in await cursor.fetchall()]
+
+        if 'perk_type' not in columns:
+            await db.execute('ALTER TABLE shop ADD COLUMN perk_type TEXT DEFAULT NULL')
+        if 'perk_value' not in columns:
+            await db.execute('ALTER TABLE shop ADD COLUMN perk_value FLOAT DEFAULT 0')
+
+    async def add_new_defaults(db: aiosqlite.Connection):
+        async with db.execute('SELECT name FROM shop WHERE limited = FALSE') as cursor:
+            existing_items = {row[0] for row in await cursor.fetchall()}
+        await db.executemany('''INSERT INTO shop (name, price, description, perk_type, perk_value, limited)
+                                VALUES (?, ?, ?, ?, ?, FALSE)''',
+                             [item for item in default_items if item[0] not in existing_items])
+
+        async with db.execute('SELECT name FROM achievements') as cursor:
+            existing_achievements = {row[0] for row in await cursor.fetchall()}
+        await db.executemany('''INSERT INTO achievements (name, description, reward, requirement)
+                                VALUES (?, ?, ?, ?)''',
+                             [a for a in achievement_rows if a[0] not in existing_achievements])
+
+    async def add_achievement_metrics(db: aiosqlite.Connection):
+        async with db.execute("PRAGMA table_info(achievements)") as cursor:
+            columns = [column[1] for column in await cursor.fetchall()]
+        if 'metric' not in columns:
+            await db.execute('ALTER TABLE achievements ADD COLUMN metric TEXT DEFAULT NULL')
+        await db.executemany('UPDATE achievements SET metric = ? WHERE name = ?',
+                             [(metric, name) for name, _, _, _, metric in default_achievements])
+
+    return [
+        Migration(
+            1, "initial tables",
+            '''CREATE TABLE IF NOT EXISTS users
+                    (user_id TEXT PRIMARY KEY,
+                    balance INTEGER DEFAULT 0,
+                    last_daily TIMESTAMP,
+                    streak INTEGER DEFAULT 0,
+                    work_count INTEGER DEFAULT 0,
+                    work_earnings INTEGER DEFAULT 0,
+                    trades_completed INTEGER DEFAULT 0,
+                    items_bought INTEGER DEFAULT 0,
+                    limited_items_bought INTEGER DEFAULT 0,
+                    total_spent INTEGER DEFAULT 0,
+                    total_gambles INTEGER DEFAULT 0,
+                    gamble_wins INTEGER DEFAULT 0)''',
+            '''CREATE TABLE IF NOT EXISTS achievements
+                        (id INTEGER PRIMARY KEY,
+                        name TEXT UNIQUE,
+                        description TEXT,
+                        reward INTEGER,
+                        requirement INTEGER)''',
+            '''CREATE TABLE IF NOT EXISTS user_achievements
+                        (user_id TEXT,
+                        achievement_id INTEGER,
+                        completed_at TIMESTAMP,
+                        FOREIGN KEY(user_id) REFERENCES users(user_id),
+                        FOREIGN KEY(achievement_id) REFERENCES achievements(id),
+                        UNIQUE(user_id, achievement_id))''',
+            '''CREATE TABLE IF NOT EXISTS shop
+                        (item_id INTEGER PRIMARY KEY,
+                        name TEXT,
+                        price INTEGER,
+                        description TEXT,
+                        limited BOOLEAN DEFAULT FALSE,
+                        available_until TIMESTAMP,
+                        stock_limit INTEGER DEFAULT NULL)''',
+            '''CREATE TABLE IF NOT EXISTS perks
+                        (id INTEGER PRIMARY KEY,
+                        name TEXT,
+                        description TEXT,
+                        effect_type TEXT,
+                        effect_value FLOAT,
+                        price INTEGER,
+                        duration INTEGER)''',
+            '''CREATE TABLE IF NOT EXISTS user_perks
+                        (user_id TEXT,
+                        perk_id INTEGER,
+                        acquired_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        expires_at TIMESTAMP,
+                        FOREIGN KEY(user_id) REFERENCES users(user_id),
+                        FOREIGN KEY(perk_id) REFERENCES perks(id))''',
+            seed_achievements,
+        ),
+        Migration(2, "inventory with UNIQUE(user_id, item_id)", rebuild_inventory),
+        Migration(
+            3, "transaction history",
+            '''CREATE TABLE IF NOT EXISTS transactions
+                        (id INTEGER PRIMARY KEY,
+                        user_id TEXT,
+                        type TEXT,
+                        amount INTEGER,
+                        timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        details TEXT,
+                        FOREIGN KEY(user_id) REFERENCES users(user_id))''',
+        ),
+        Migration(
+            4, "perk support for shop and inventory",
+            add_perk_columns,
+            # Add active_effects table to track combined bonuses
+            '''CREATE TABLE IF NOT EXISTS active_effects
+                        (user_id TEXT,
+                        effect_type TEXT,
+                        total_bonus FLOAT,
+                        last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        FOREIGN KEY(user_id) REFERENCES users(user_id),
+                        UNIQUE(user_id, effect_type))''',
+        ),
+        Migration(5, "new shop items and achievements", add_new_defaults),
+        set_pragma(6, 'journal_mode', 'WAL'),
+        Migration(
+            7, "balance leaderboard index",
+            'CREATE INDEX IF NOT EXISTS idx_users_balance ON users(balance DESC)',
+        ),
+        Migration(
+            8, "typed achievement metrics",
+            add_achievement_metrics,
+            'CREATE INDEX IF NOT EXISTS idx_achievements_metric ON achievements(metric, requirement)',
+        ),
+    ]
+
+
+async def init_lunacy_db(default_items: Sequence[tuple], default_achievements: Sequence[tuple],
+                         db_path: str = LUNACY_DB_PATH) -> int:
+    """Bring lunacy.db up to the latest schema version"""
+    return await migrate(db_path, lunacy_migrations(default_items, default_achievements))
@@ -0,0 +1,85 @@
+import logging
+from typing import Awaitable, Callable, Iterable, List, Union
+
+import aiosqlite
+
+logger = logging.getLogger(__name__)
+
+Step = Union[str, Callable[[aiosqlite.Connection], Awaitable[None]]]
+
+
+class MigrationError(Exception):
+    pass
+
+
+class Migration:
+    """One ordered schema change.
+
+    ``steps`` are SQL strings or async callables taking the connection.
+    Transactional migrations run inside BEGIN/COMMIT together with their
+    db_version row. Set ``transactional=False`` for statements SQLite
+    refuses inside a transaction, such as ``PRAGMA journal_mode``.
+    Every step should be safe to re-run.
+    """
+
+    __slots__ = ('version', 'description', 'steps', 'transactional')
+
+    def __init__(self, version: int, description: str, *steps: Step, transactional: bool = True):
+        self.version = version
+        self.description = description
+        self.steps = steps
+        self.transactional = transactional
+
+    async def apply(self, db: aiosqlite.Connection):
+        for step in self.steps:
+            if isinstance(step, str):
+                await db.execute(step)
+            else:
+                await step(db)
+
+
+def set_pragma(version: int, name: str, value) -> Migration:
+    """A non-transactional migration that sets a persistent pragma such as journal_mode"""
+    return Migration(version, f"PRAGMA {name} = {value}", f'PRAGMA {name} = {value}', transactional=False)
+
+
+async def get_version(db: aiosqlite.Connection) -> int:
+    await db.execute('''
+        CREATE TABLE IF NOT EXISTS db_version (
+            version INTEGER PRIMARY KEY,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    async with db.execute('SELECT MAX(version) FROM db_version') as cursor:
+        row = await cursor.fetchone()
+    return row[0] or 0
+
+
+async def migrate(db_path: str, migrations: Iterable[Migration]) -> int:
+    """Apply every migration newer than the recorded db_version and return the final version"""
+    ordered: List[Migration] = sorted(migrations, key=lambda m: m.version)
+    async with aiosqlite.connect(db_path) as db:
+        current = await get_version(db)
+        await db.commit()
+
+        for migration in ordered:
+            if migration.version <= current:
+                continue
+            try:
+                if migration.transactional:
+                    await db.execute('BEGIN')
+                await migration.apply(db)
+                await db.execute(
+                    'INSERT OR REPLACE INTO db_version (version, updated_at) VALUES (?, CURRENT_TIMESTAMP)',
+                    (migration.version,)
+                )
+                await db.commit()
+            except Exception as e:
+                if db.in_transaction:
+                    await db.rollback()
+                logger.error(f"Migration {migration.version} ({migration.description}) failed on {db_path}: {e}")
+                raise MigrationError(f"Migration {migration.version} failed: {str(e)}")
+            current = migration.version
+            logger.info(f"Applied migration {migration.version} to {db_path}: {migration.description}")
+
+    return current
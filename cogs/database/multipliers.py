@@ -0,0 +1,82 @@
+import heapq
+import time
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# (multiplier, expires_at as a unix timestamp or None)
+Entry = Tuple[float, Optional[float]]
+
+
+class GuildMultipliers:
+    """Active XP multipliers for one guild.
+
+    The effective multiplier for a member is
+    ``server * events * best matching role * user``. Timed entries sit in a
+    heap keyed on expiry so expired ones are evicted without rescanning.
+    """
+
+    __slots__ = ('server', 'events', 'roles', 'users', '_expiry_heap')
+
+    def __init__(self):
+        self.server: Dict[str, Entry] = {}
+        self.events: Dict[str, Entry] = {}
+        self.roles: Dict[int, Entry] = {}
+        self.users: Dict[str, Entry] = {}
+        self._expiry_heap: List[Tuple[float, str, object]] = []
+
+    def __bool__(self) -> bool:
+        return bool(self.server or self.events or self.roles or self.users)
+
+    def _table(self, multiplier_type: str) -> Dict:
+        return {
+            'server': self.server,
+            'event': self.events,
+            'role': self.roles,
+            'user': self.users,
+        }[multiplier_type]
+
+    def add(self, multiplier_type: str, target_id: str, multiplier: float, expires_at: Optional[datetime] = None):
+        key = int(target_id) if multiplier_type == 'role' else target_id
+        expires_ts = expires_at.timestamp() if expires_at else None
+        self._table(multiplier_type)[key] = (multiplier, expires_ts)
+        if expires_ts is not None:
+            heapq.heappush(self._expiry_heap, (expires_ts, multiplier_type, key))
+
+    def evict_expired(self, now: Optional[float] = None):
+        now = time.time() if now is None else now
+        heap = self._expiry_heap
+        while heap and heap[0][0] <= now:
+            expires_ts, multiplier_type, key = heapq.heappop(heap)
+            table = self._table(multiplier_type)
+            entry = table.get(key)
+            # Skip stale heap items for entries that were since replaced
+            if entry is not None and entry[1] == expires_ts:
+                del table[key]
+
+    def resolve(self, role_ids: Iterable[int], user_id: str, now: Optional[float] = None) -> float:
+        """Effective multiplier for a member with the given role ids."""
+        if self._expiry_heap:
+            self.evict_expired(now)
+        if not self:
+            return 1.0
+
+        multiplier = 1.0
+        for value, _ in self.server.values():
+            multiplier *= value
+        for value, _ in self.events.values():
+            multiplier *= value
+
+        if self.roles:
+            best_role = None
+            roles = self.roles
+            for role_id in role_ids:
+                entry = roles.get(role_id)
+                if entry is not None and (best_role is None or entry[0] > best_role):
+                    best_role = entry[0]
+            if best_role is not None:
+                multiplier *= best_role
+
+        user_entry = self.users.get(user_id)
+        if user_entry is not None:
+            multiplier *= user_entry[0]
+        return multiplier
@@ -0,0 +1,95 @@
+from collections import OrderedDict
+from typing import Iterable, Optional, Tuple
+
+# perk_type values stored in the shop table
+PERK_TYPES = ('daily_bonus', 'work_bonus', 'gamble_bonus', 'trade_bonus', 'all_bonus')
+
+
+class PerkBonuses:
+    """Summed perk values of the distinct items one user owns, by perk type."""
+
+    __slots__ = ('daily', 'work', 'gamble', 'trade', 'all')
+
+    def __init__(self, daily: float = 0.0, work: float = 0.0, gamble: float = 0.0,
+                 trade: float = 0.0, all: float = 0.0):
+        self.daily = daily
+        self.work = work
+        self.gamble = gamble
+        self.trade = trade
+        self.all = all
+
+    @staticmethod
+    def _slot(perk_type: str) -> Optional[str]:
+        if perk_type not in PERK_TYPES:
+            return None
+        return perk_type[:-len('_bonus')]
+
+    def add(self, perk_type: Optional[str], value: float):
+        slot = self._slot(perk_type)
+        if slot is not None:
+            setattr(self, slot, getattr(self, slot) + (value or 0))
+
+    def get(self, bonus_type: str) -> float:
+        """Bonus for a perk type such as 'work_bonus', including 'all_bonus' items"""
+        if bonus_type == 'all_bonus':
+            return self.all
+        slot = self._slot(bonus_type)
+        return (getattr(self, slot) if slot else 0.0) + self.all
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Tuple[Optional[str], float]]) -> 'PerkBonuses':
+        """Build from (perk_type, SUM(perk_value)) rows"""
+        bonuses = cls()
+        for perk_type, value in rows:
+            bonuses.add(perk_type, value)
+        return bonuses
+
+
+class BonusCache:
+    """LRU of PerkBonuses per user.
+
+    ``version`` changes on every update or invalidation. A loader reads it
+    before querying and passes it to ``put`` so a result that raced with a
+    write is not cached.
+    """
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self.version = 0
+        self._entries: 'OrderedDict[str, PerkBonuses]' = OrderedDict()
+
+    def __contains__(self, user_id: str) -> bool:
+        return user_id in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, user_id: str) -> Optional[PerkBonuses]:
+        bonuses = self._entries.get(user_id)
+        if bonuses is not None:
+            self._entries.move_to_end(user_id)
+        return bonuses
+
+    def put(self, user_id: str, bonuses: PerkBonuses, version: int):
+        if version != self.version:
+            return
+        self._entries[user_id] = bonuses
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def add_item(self, user_id: str, perk_type: Optional[str], value: float):
+        """Fold a newly owned item into a cached vector"""
+        self.version += 1
+        bonuses = self._entries.get(user_id)
+        if bonuses is not None:
+            bonuses.add(perk_type, value)
+
+    def invalidate(self, user_ids: Iterable[str]):
+        self.version += 1
+        for user_id in user_ids:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        self.version += 1
+        self._entries.clear()
@@ -0,0 +1,109 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import List, Optional, Tuple
+
+import aiosqlite
+
+logger = logging.getLogger(__name__)
+
+# Applied once to every pooled connection when it is opened.
+# journal_mode is stored in the database file, the rest are per-connection.
+DEFAULT_PRAGMAS: Tuple[Tuple[str, object], ...] = (
+    ('journal_mode', 'WAL'),
+    ('synchronous', 'NORMAL'),
+    ('busy_timeout', 5000),
+    ('temp_store', 'MEMORY'),
+    ('cache_size', -16000),      # ~16 MB page cache per connection
+    ('mmap_size', 134217728),    # 128 MB
+)
+
+
+class ConnectionPool:
+    """A bounded set of persistent aiosqlite connections.
+
+    One connection is reserved for writes and serialized behind a lock,
+    the others are read-only and handed out through a queue. WAL mode lets
+    readers run while the writer holds a transaction.
+    """
+
+    def __init__(self, db_path: str, readers: int = 4, pragmas: Tuple[Tuple[str, object], ...] = DEFAULT_PRAGMAS):
+        self.db_path = db_path
+        self.reader_count = max(1, readers)
+        self.pragmas = pragmas
+        self._writer: Optional[aiosqlite.Connection] = None
+        self._readers: Optional[asyncio.Queue] = None
+        self._connections: List[aiosqlite.Connection] = []
+        self._write_lock = asyncio.Lock()
+        self._open_lock = asyncio.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        return self._writer is not None
+
+    async def _connect(self, read_only: bool = False) -> aiosqlite.Connection:
+        conn = await aiosqlite.connect(self.db_path)
+        for name, value in self.pragmas:
+            await conn.execute(f'PRAGMA {name} = {value}')
+        if read_only:
+            await conn.execute('PRAGMA query_only = ON')
+        self._connections.append(conn)
+        return conn
+
+    async def open(self):
+        """Open the writer and reader connections. Safe to call more than once."""
+        async with self._open_lock:
+            if self.is_open:
+                return
+            try:
+                writer = await self._connect()
+                readers = asyncio.Queue()
+                for _ in range(self.reader_count):
+                    readers.put_nowait(await self._connect(read_only=True))
+            except Exception:
+                await self._close_all()
+                raise
+            self._readers = readers
+            self._writer = writer
+            logger.info(f"Opened connection pool for {self.db_path} (1 writer, {self.reader_count} readers)")
+
+    async def close(self):
+        """Close every pooled connection."""
+        async with self._open_lock:
+            await self._close_all()
+
+    async def _close_all(self):
+        for conn in self._connections:
+            try:
+                await conn.close()
+            except Exception as e:
+                logger.error(f"Failed to close pooled connection: {e}")
+        self._connections.clear()
+        self._writer = None
+        self._readers = None
+
+    @asynccontextmanager
+    async def reader(self):
+        """Borrow a read-only connection for the duration of the block."""
+        if not self.is_open:
+            await self.open()
+        readers = self._readers
+        conn = await readers.get()
+        try:
+            yield conn
+        finally:
+            readers.put_nowait(conn)
+
+    @asynccontextmanager
+    async def writer(self):
+        """Hold the writer connection exclusively; uncommitted work is rolled back on error."""
+        if not self.is_open:
+            await self.open()
+        async with self._write_lock:
+            conn = self._writer
+            try:
+                yield conn
+            except BaseException:
+                if conn.in_transaction:
+                    await conn.rollback()
+                raise
@@ -1,18 +1,37 @@
-import sqlite3
 import aiosqlite
 
-async def init_db():
-    async with aiosqlite.connect('cogs/data/levelup.db') as db:
-        # Create version tracking table
-        await db.execute('''
-            CREATE TABLE IF NOT EXISTS db_version (
-                version INTEGER PRIMARY KEY,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
+from .migrations import Migration, migrate, set_pragma
+
+LEVELS_DB_PATH = 'cogs/data/levelup.db'
+
+
+async def _allow_event_multipliers(db: aiosqlite.Connection):
+    """Rebuild xp_multipliers if its CHECK constraint predates the 'event' type"""
+    async with db.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'xp_multipliers'") as cursor:
+        row = await cursor.fetchone()
+    if row and "'event'" in row[0]:
+        return
+
+    await db.execute('''
+        CREATE TABLE xp_multipliers_new (
+            guild_id TEXT,
+            multiplier_type TEXT CHECK (multiplier_type IN ('server', 'role', 'user', 'event')),
+            target_id TEXT,
+            multiplier FLOAT DEFAULT 1.0,
+            expires_at TIMESTAMP,
+            PRIMARY KEY (guild_id, multiplier_type, target_id)
+        )
+    ''')
+    await db.execute('INSERT INTO xp_multipliers_new SELECT guild_id, multiplier_type, target_id, multiplier, expires_at FROM xp_multipliers')
+    await db.execute('DROP TABLE xp_multipliers')
+    await db.execute('ALTER TABLE xp_multipliers_new RENAME TO xp_multipliers')
+
+
+LEVEL_MIGRATIONS = [
+    Migration(
+        1, "initial schema",
         # Create levels table with indexes
-        await db.execute('''
+        '''
             CREATE TABLE IF NOT EXISTS levels (
                 guild_id TEXT,
                 user_id TEXT,
@@ -21,21 +40,19 @@ async def init_db():
                 last_xp_gain TIMESTAMP,
                 PRIMARY KEY (guild_id, user_id)
             )
-        ''')
-        await db.execute('CREATE INDEX IF NOT EXISTS idx_levels_guild ON levels(guild_id)')
-        
+        ''',
+        'CREATE INDEX IF NOT EXISTS idx_levels_guild ON levels(guild_id)',
         # Create level roles table with foreign key
-        await db.execute('''
+        '''
             CREATE TABLE IF NOT EXISTS level_roles (
                 guild_id TEXT,
                 level INTEGER CHECK (level >= 1),
                 role_id INTEGER NOT NULL,
                 PRIMARY KEY (guild_id, level)
             )
-        ''')
-        
+        ''',
         # Create guild config table with constraints
-        await db.execute('''
+        '''
             CREATE TABLE IF NOT EXISTS guild_config (
                 guild_id TEXT PRIMARY KEY,
                 xp_cooldown INTEGER DEFAULT 10 CHECK (xp_cooldown >= 1),
@@ -43,27 +60,39 @@ async def init_db():
                 level_channel_id INTEGER,
                 is_blocked BOOLEAN DEFAULT 0
             )
-        ''')
-        
+        ''',
         # Create restricted entities table with type constraint
-        await db.execute('''
+        '''
             CREATE TABLE IF NOT EXISTS restricted_entities (
                 guild_id TEXT,
                 entity_id TEXT,
                 entity_type TEXT CHECK (entity_type IN ('user', 'channel')),
                 PRIMARY KEY (guild_id, entity_id, entity_type)
             )
-        ''')
-        
-        await db.execute('''
+        ''',
+        '''
             CREATE TABLE IF NOT EXISTS xp_multipliers (
                 guild_id TEXT,
-                multiplier_type TEXT CHECK (multiplier_type IN ('server', 'role', 'user')),
+                multiplier_type TEXT CHECK (multiplier_type IN ('server', 'role', 'user', 'event')),
                 target_id TEXT,
                 multiplier FLOAT DEFAULT 1.0,
                 expires_at TIMESTAMP,
                 PRIMARY KEY (guild_id, multiplier_type, target_id)
             )
-        ''')
+        ''',
+    ),
+    set_pragma(2, 'journal_mode', 'WAL'),
+    Migration(
+        3, "covering leaderboard index",
+        # Serves leaderboard order, rank counts and paging without a sort
+        'CREATE INDEX IF NOT EXISTS idx_levels_rank ON levels(guild_id, level DESC, xp DESC, user_id)',
+        # Every guild_id lookup is covered by the primary key or idx_levels_rank
+        'DROP INDEX IF EXISTS idx_levels_guild',
+    ),
+    Migration(4, "allow 'event' XP multipliers", _allow_event_multipliers),
+]
+
 
-        await db.commit()
+async def init_db(db_path: str = LEVELS_DB_PATH) -> int:
+    """Bring the level database up to the latest schema version"""
+    return await migrate(db_path, LEVEL_MIGRATIONS)
@@ -0,0 +1,77 @@
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from utils.leveling import apply_xp
+
+Key = Tuple[str, str]
+
+
+class XPLedger:
+    """In-memory (xp, level) state per (guild_id, user_id).
+
+    XP is applied here first and the changed rows are marked dirty; the
+    owner is responsible for persisting ``take_dirty()`` in batches.
+    """
+
+    def __init__(self, flush_threshold: int = 500, max_entries: int = 50000):
+        self.flush_threshold = flush_threshold
+        self.max_entries = max_entries
+        self._entries: Dict[Key, List[int]] = {}
+        self._dirty: Set[Key] = set()
+
+    def __contains__(self, key: Key) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def dirty_count(self) -> int:
+        return len(self._dirty)
+
+    @property
+    def should_flush(self) -> bool:
+        return len(self._dirty) >= self.flush_threshold
+
+    def get(self, key: Key) -> Optional[Tuple[int, int]]:
+        """Return (xp, level) if the key is held in memory"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        return entry[0], entry[1]
+
+    def load(self, key: Key, xp: int, level: int):
+        """Seed a key with persisted values unless it is already held"""
+        self._entries.setdefault(key, [xp, level])
+
+    def set(self, key: Key, xp: int, level: int, dirty: bool = True):
+        self._entries[key] = [xp, level]
+        if dirty:
+            self._dirty.add(key)
+        else:
+            self._dirty.discard(key)
+
+    def apply(self, key: Key, xp_amount: int) -> Tuple[bool, int, int]:
+        """Add XP to a loaded key and return (leveled_up, new_level, current_xp)"""
+        entry = self._entries[key]
+        leveled_up, current_level, current_xp = apply_xp(entry[1], entry[0], xp_amount)
+        entry[0] = current_xp
+        entry[1] = current_level
+        self._dirty.add(key)
+        return leveled_up, current_level, current_xp
+
+    def take_dirty(self) -> List[Tuple[str, str, int, int]]:
+        """Snapshot dirty rows as (guild_id, user_id, xp, level) and mark them clean"""
+        rows = [(key[0], key[1], *self._entries[key]) for key in self._dirty if key in self._entries]
+        self._dirty.clear()
+        return rows
+
+    def mark_dirty(self, keys: Iterable[Key]):
+        """Re-queue keys whose flush failed"""
+        self._dirty.update(key for key in keys if key in self._entries)
+
+    def trim(self):
+        """Drop clean entries once the ledger grows past max_entries"""
+        if len(self._entries) <= self.max_entries:
+            return
+        for key in [key for key in self._entries if key not in self._dirty]:
+            del self._entries[key]
@@ -210,6 +210,13 @@ class HelpDropdown(Select):
                 ),
                 inline=False
             )
+                embed.add_field(name="**Keyword Response commands**", value=(
+                    "`keyword` - List this server's custom keyword responses.\n"
+                    "`keyword add <keyword> <response>` - Reply to a keyword with a response (add several for a random pick).\n"
+                    "`keyword remove <keyword>` - Remove a custom keyword.\n"
+                ),
+                inline=False
+            )
         elif category == "Lunacy Commands":
             embed.add_field(name="**Currency Commands**", value=(
                 "`balance` - Check your Luna balance.\n"
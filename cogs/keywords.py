@@ -0,0 +1,104 @@
+import discord
+from discord.ext import commands
+from datetime import datetime, timezone
+
+MAX_KEYWORDS = 100  # per guild
+MAX_RESPONSES = 20  # per keyword
+MAX_KEYWORD_LENGTH = 50
+
+
+class Keywords(commands.Cog):
+    """Per-guild custom keyword responses, sent by the keyword stage of the message pipeline."""
+
+    def __init__(self, bot):
+        self.bot = bot
+
+    @commands.group(name="keyword", invoke_without_command=True)
+    @commands.has_permissions(administrator=True)
+    async def keyword(self, ctx):
+        """List this server's custom keyword responses."""
+        keywords = self.bot.keywords.get_guild(ctx.guild.id)
+        embed = discord.Embed(
+            title="💬 Keyword Responses",
+            color=discord.Color.blue(),
+            timestamp=datetime.now(timezone.utc)
+        )
+        if not keywords:
+            embed.description = "No custom keywords yet. Use `keyword add <keyword> <response>` to add one."
+        else:
+            embed.description = "\n".join(
+                f"• `{keyword}` ({len(responses)} response{'s' if len(responses) != 1 else ''})"
+                for keyword, responses in keywords.items()
+            )[:4096]
+            embed.set_footer(text=f"{len(keywords)}/{MAX_KEYWORDS} keywords • earlier keywords take priority")
+        await ctx.send(embed=embed)
+
+    @keyword.command(name="add")
+    @commands.has_permissions(administrator=True)
+    async def keyword_add(self, ctx, keyword: str, *, response: str):
+        """Add a response to a keyword; a keyword with several responses picks one at random."""
+        keyword = keyword.lower()
+        keywords = dict(self.bot.keywords.get_guild(ctx.guild.id))
+        responses = list(keywords.get(keyword, []))
+
+        error = None
+        if len(keyword) > MAX_KEYWORD_LENGTH:
+            error = f"Keywords can be at most {MAX_KEYWORD_LENGTH} characters long."
+        elif keyword not in keywords and len(keywords) >= MAX_KEYWORDS:
+            error = f"This server already has {MAX_KEYWORDS} keywords."
+        elif len(responses) >= MAX_RESPONSES:
+            error = f"Keyword '{keyword}' already has {MAX_RESPONSES} responses."
+        if error:
+            embed = discord.Embed(
+                title="⚠️ Keyword Not Added",
+                description=error,
+                color=discord.Color.orange(),
+                timestamp=datetime.now(timezone.utc)
+            )
+            await ctx.send(embed=embed)
+            return
+
+        responses.append(response)
+        keywords[keyword] = responses
+        self.bot.keywords.set_guild(ctx.guild.id, keywords)
+
+        embed = discord.Embed(
+            title="✅ Keyword Response Added",
+            description=f"Messages containing '{keyword}' may now get: {response}",
+            color=discord.Color.brand_green(),
+            timestamp=datetime.now(timezone.utc)
+        )
+        embed.set_footer(text=f"Updated by {ctx.author}")
+        await ctx.send(embed=embed)
+
+    @keyword.command(name="remove")
+    @commands.has_permissions(administrator=True)
+    async def keyword_remove(self, ctx, *, keyword: str):
+        """Remove a custom keyword and all of its responses."""
+        keyword = keyword.lower()
+        keywords = dict(self.bot.keywords.get_guild(ctx.guild.id))
+        if keyword not in keywords:
+            embed = discord.Embed(
+                title="Keyword Not Found",
+                description=f"Keyword '{keyword}' is not set for this server.",
+                color=discord.Color.red(),
+                timestamp=datetime.now(timezone.utc)
+            )
+            await ctx.send(embed=embed)
+            return
+
+        del keywords[keyword]
+        self.bot.keywords.set_guild(ctx.guild.id, keywords)
+
+        embed = discord.Embed(
+            title="Keyword Removed",
+            description=f"Keyword '{keyword}' has been removed.",
+            color=discord.Color.green(),
+            timestamp=datetime.now(timezone.utc)
+        )
+        embed.set_footer(text=f"Updated by {ctx.author}")
+        await ctx.send(embed=embed)
+
+
+async def setup(bot):
+    await bot.add_cog(Keywords(bot))
@@ -1,10 +1,8 @@
 import discord
 import aiofiles
 import shutil
-import aiohttp
 import random
 import os
-import aiosqlite
 import json
 import asyncio
 import logging
@@ -13,9 +11,11 @@ from typing import Union
 from io import BytesIO
 from discord.ext import commands, tasks
 from discord.ext.commands import cooldown, BucketType
-from PIL import Image, ImageDraw, ImageFont
 from .database.db_manager import LevelDatabase
 from .database.schema import init_db
+from core.pipeline import Stage
+from utils.leaderboard_image import LeaderboardRenderer
+from utils.leveling import xp_for_level, xp_to_next
 from datetime import datetime, timedelta, timezone
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -25,6 +25,7 @@ class LevelSystem(commands.Cog):
     def __init__(self, bot):
         self.bot = bot       
         self.db = LevelDatabase()
+        self.renderer = LeaderboardRenderer()
         self.last_message_time = {}
 
         self.progress_bar_styles = [
@@ -39,25 +40,35 @@ class LevelSystem(commands.Cog):
     async def cog_load(self):
         """Initialize the cog by loading data asynchronously."""
         await init_db()
-        
-    def cog_unload(self):
-        """Cleanup when the cog is unloaded."""
-        pass
+        await self.db.connect()
+        self.flush_xp_ledger.start()
+        # Commands earn XP like any other message, as they always have
+        self.bot.pipeline.register(Stage.SCORE, "levelup", self.award_xp, commands=True)
+
+    async def cog_unload(self):
+        """Cleanup when the cog is unloaded (also runs on bot shutdown)."""
+        self.bot.pipeline.unregister("levelup")
+        self.flush_xp_ledger.cancel()
+        self.renderer.close()
+        await self.db.close()  # flushes pending XP before closing
+
+    @tasks.loop(seconds=5)
+    async def flush_xp_ledger(self):
+        """Persist XP accumulated in memory since the last flush."""
+        try:
+            await self.db.flush_xp()
+        except Exception:
+            logger.exception("Periodic XP flush failed:")
 
     async def is_user_restricted(self, guild_id: str, user_id: str) -> bool:
         """Check if a user is restricted from gaining XP."""
-        async with aiosqlite.connect(self.db.db_path) as db:
-            async with db.execute(
-                'SELECT 1 FROM restricted_entities WHERE guild_id = ? AND entity_id = ? AND entity_type = ?',
-                (guild_id, user_id, 'user')
-            ) as cursor:
-                return bool(await cursor.fetchone())
+        return await self.db.is_entity_restricted(guild_id, user_id, 'user')
 
     async def can_receive_xp(self, guild_id: str, user_id: str) -> bool:
         """Check if enough time has passed to receive more XP."""
         now = datetime.now(timezone.utc)
-        guild_config = await self.db.get_guild_config(guild_id)
-        cooldown = guild_config.get('xp_cooldown', 10)  # Default 10 seconds
+        guild_config = await self.db.get_config(guild_id)
+        cooldown = guild_config.xp_cooldown
         
         last_time = self.last_message_time.get((guild_id, user_id))
         if last_time is None or (now - last_time).total_seconds() >= cooldown:
@@ -72,11 +83,11 @@ class LevelSystem(commands.Cog):
         user_id = str(user_id)
 
         # Check if the guild is blocked
-        guild_config = await self.db.get_guild_config(guild_id)
-        if guild_config.get('is_blocked'):
+        guild_config = await self.db.get_config(guild_id)
+        if guild_config.is_blocked:
             return False
 
-        if await self.is_user_restricted(guild_id, user_id):
+        if user_id in guild_config.restricted_users:
             return False
 
         leveled_up, new_level, current_xp = await self.db.add_xp(guild_id, user_id, xp)
@@ -85,7 +96,7 @@ class LevelSystem(commands.Cog):
 
     def xp_for_next_level(self, level):
         """Calculate the XP required for the next level."""
-        return int(100 * (level ** 1.5))
+        return xp_for_level(level)
 
     def create_progress_bar(self, current_xp, xp_needed, bar_length=20):
         """Generate a random custom ASCII progress bar for the level embed."""
@@ -94,25 +105,6 @@ class LevelSystem(commands.Cog):
         bar = full_char * progress + empty_char * (bar_length - progress)
         return bar
 
-    async def get_dominant_color_from_image(self, image_url):
-        """Asynchronously extract the dominant color from an image URL."""
-        try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(image_url) as response:
-                    if response.status == 200:
-                        image_data = await response.read()
-                        img = Image.open(BytesIO(image_data))
-                        img = img.convert("RGB")
-                        img = img.resize((1, 1))
-                        dominant_color = img.getpixel((0, 0))
-                        return discord.Color.from_rgb(*dominant_color)
-                    else:
-                        logger.error(f"Failed to fetch image: Status {response.status}")
-                        return discord.Color.blurple()
-        except Exception:
-            logger.exception("Exception occurred while fetching dominant color:")
-            return discord.Color.blurple()
-
     async def get_random_level_up_message(self, user):
         """Returns a random level-up message."""
         level_data = await self.db.get_user_level(str(user.guild.id), str(user.id))
@@ -182,38 +174,33 @@ class LevelSystem(commands.Cog):
         else:
             await ctx.send(f"{member.mention} is no longer restricted from gaining XP.")
 
-    @commands.Cog.listener()
-    async def on_message(self, message):
-        """Handle incoming messages for XP awarding and command processing."""
-        if message.author.bot or message.guild is None:
-            return
-
-        guild_id = str(message.guild.id)
+    async def award_xp(self, context):
+        """Pipeline stage: award XP for a guild message that passed moderation."""
+        message = context.message
+        guild_id = str(context.guild_id)
         user_id = str(message.author.id)
         channel_id = message.channel.id
+        guild_config = await self.db.get_config(guild_id)
 
         # Check for restrictions
-        if await self.is_user_restricted(guild_id, user_id):
+        if user_id in guild_config.restricted_users:
             return
 
         # Check if channel is restricted
-        async with aiosqlite.connect(self.db.db_path) as db:
-            async with db.execute(
-                'SELECT 1 FROM restricted_entities WHERE guild_id = ? AND entity_id = ? AND entity_type = ?',
-                (guild_id, str(channel_id), 'channel')
-            ) as cursor:
-                if await cursor.fetchone():
-                    return
+        if str(channel_id) in guild_config.restricted_channels:
+            return
 
         # Award XP if the user can receive it
         if await self.can_receive_xp(guild_id, user_id):
-            guild_config = await self.db.get_guild_config(guild_id)
-            xp_amount = guild_config.get('xp_amount', 10)
+            xp_amount = guild_config.xp_amount
+            multipliers = await self.db.get_multipliers(guild_id)
+            if multipliers:
+                role_ids = (role.id for role in getattr(message.author, 'roles', ()))
+                xp_amount = int(xp_amount * multipliers.resolve(role_ids, user_id))
             leveled_up = await self.add_xp(guild_id, user_id, xp_amount)
 
             if leveled_up:
-                level_channel_id = guild_config.get('level_channel_id', message.channel.id)
-                level_up_channel = message.guild.get_channel(level_channel_id) or message.channel
+                level_up_channel = message.guild.get_channel(guild_config.level_channel_id or channel_id) or message.channel
 
                 level_up_message = await self.get_random_level_up_message(message.author)
                 await level_up_channel.send(level_up_message)
@@ -252,16 +239,17 @@ class LevelSystem(commands.Cog):
         xp_needed = self.xp_for_next_level(level)
 
         # XP remaining to level up
-        xp_remaining = xp_needed - xp
+        xp_remaining = xp_to_next(level, xp)
 
         # Progress bar
         progress_bar = self.create_progress_bar(xp, xp_needed)
 
-        # User's avatar URL
-        avatar_url = member.avatar.url if member.avatar else member.default_avatar.url
+        # User's avatar
+        avatar = member.avatar or member.default_avatar
+        avatar_url = avatar.url
 
-        # Get the dominant color from the avatar image
-        embed_color = await self.get_dominant_color_from_image(str(avatar_url))
+        # Get the dominant color from the avatar image (memoized per avatar hash)
+        embed_color = await self.bot.avatar_colors.get_color(avatar)
 
         # Create the embed message
         embed = discord.Embed(
@@ -276,6 +264,15 @@ class LevelSystem(commands.Cog):
         # Add more details about the XP remaining
         embed.add_field(name="XP Remaining", value=f"{xp_remaining} XP until next level", inline=False)
 
+        # Server rank, if the user has earned any XP here
+        rank_data = await self.db.get_user_rank(guild_id, user_id)
+        if rank_data:
+            embed.add_field(
+                name="Rank",
+                value=f"#{rank_data['rank']} of {rank_data['total']} (top {rank_data['rank'] / rank_data['total'] * 100:.1f}%)",
+                inline=False
+            )
+
         # Send the embed
         await ctx.send(embed=embed)
 
@@ -422,6 +419,8 @@ class LevelSystem(commands.Cog):
         for m_type, target_id, multiplier, expires_at in multipliers:
             if m_type == "server":
                 name = "Server-wide"
+            elif m_type == "event":
+                name = f"Event: {target_id}"
             elif m_type == "role":
                 role = ctx.guild.get_role(int(target_id))
                 name = f"Role: {role.name}" if role else "Unknown Role"
@@ -476,54 +475,41 @@ class LevelSystem(commands.Cog):
 
 
     @commands.command(name="toplevel")
-    async def toplevel(self, ctx):
+    async def toplevel(self, ctx, page: int = 1):
         """Display the top users by XP in the current guild, with avatars, sorted by level."""
-        top_users = await self.db.get_top_users(str(ctx.guild.id))
+        page = max(1, page)
+        per_page = 10
+        top_users = await self.db.get_page(str(ctx.guild.id), (page - 1) * per_page, per_page)
 
         if top_users:
-            user_count = len(top_users)
-            width, height = 900, 100 + user_count * 80
-            leaderboard_image = Image.new("RGB", (width, height), color=(30, 30, 30))
-
-            draw = ImageDraw.Draw(leaderboard_image)
-            font_path = "assets/fonts/segoe-ui-semibold.ttf"
-            font = ImageFont.truetype(font_path, 30)
-
-            y_offset = 40
-
-            for i, (user_id, level, xp) in enumerate(top_users, 1):
-                user = self.bot.get_user(int(user_id))
-                if user:
-                    avatar_asset = user.avatar or user.default_avatar
-                    avatar_bytes = await avatar_asset.read()
-                    avatar_image = Image.open(BytesIO(avatar_bytes)).convert("RGBA")
-                    avatar_image = avatar_image.resize((50, 50))
-
-                    mask = avatar_image.split()[3]
-                    leaderboard_image.paste(avatar_image, (50, y_offset), mask)
-
-                    draw.text(
-                        (120, y_offset + 10),
-                        f"{i}. {user.name} - Level {level} ({xp} XP)",
-                        fill=(255, 255, 255),
-                        font=font
-                    )
-
-                    y_offset += 80
-
-            with BytesIO() as image_binary:
-                leaderboard_image.save(image_binary, 'PNG')
-                image_binary.seek(0)
-
-                file = discord.File(fp=image_binary, filename="leaderboard.png")
-                embed = discord.Embed(
-                    title=f"{ctx.guild.name} Leaderboard",
-                    description="Here's the top 10 users of this server.",
-                    color=discord.Color.blurple()
-                )
-                embed.set_image(url="attachment://leaderboard.png")
-
-                await ctx.send(file=file, embed=embed)
+            # Names come from the gateway or profile cache; misses are fetched concurrently
+            profiles = await self.bot.profiles.resolve_many(int(user_id) for user_id, _, _ in top_users)
+            rows = []
+            for i, (user_id, level, xp) in enumerate(top_users, (page - 1) * per_page + 1):
+                profile = profiles.get(int(user_id))
+                if profile:
+                    rows.append((i, profile.name, level, xp, profile.avatar_key))
+
+            # The image is reused until a rank, name or avatar on this page changes
+            cache_key = (ctx.guild.id, page)
+            png = self.renderer.get_cached(cache_key, rows)
+            if png is None:
+                missing = [p for p in profiles.values() if not self.renderer.has_avatar(p.avatar_key)]
+                downloaded = await self.bot.profiles.read_avatars(missing)
+                avatar_bytes = {profiles[user_id].avatar_key: data for user_id, data in downloaded.items()}
+                png = await self.renderer.render(cache_key, rows, avatar_bytes)
+
+            file = discord.File(fp=BytesIO(png), filename="leaderboard.png")
+            embed = discord.Embed(
+                title=f"{ctx.guild.name} Leaderboard",
+                description="Here's the top 10 users of this server." if page == 1 else f"Page {page} of this server's leaderboard.",
+                color=discord.Color.blurple()
+            )
+            embed.set_image(url="attachment://leaderboard.png")
+
+            await ctx.send(file=file, embed=embed)
+        elif page > 1:
+            await ctx.send(f"There's no page {page} on this server's leaderboard.")
         else:
             await ctx.send("No users have XP in this server yet.")
 
@@ -619,7 +605,5 @@ class LevelSystem(commands.Cog):
         else:
             await ctx.send("XP award has been **unblocked** for this guild.")
 
-        await self.save_blocked_guilds()
-
 async def setup(bot):
     await bot.add_cog(LevelSystem(bot))
\ No newline at end of file
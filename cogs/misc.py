@@ -7,6 +7,8 @@ import discord
 from discord.ext import commands
 from discord.ext.commands import BucketType
 
+from core.pipeline import Stage
+
 class Misc(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
@@ -14,6 +16,13 @@ class Misc(commands.Cog):
         self.command_invokes = 0
         self.received_dms = []
 
+    async def cog_load(self):
+        # DMs only, commands included, ahead of everything else
+        self.bot.pipeline.register(Stage.FILTER, "dm_forward", self.forward_dm, guilds=False, dms=True, commands=True)
+
+    def cog_unload(self):
+        self.bot.pipeline.unregister("dm_forward")
+
     @commands.Cog.listener()
     async def on_command(self, ctx):
         self.command_invokes += 1
@@ -274,30 +283,27 @@ class Misc(commands.Cog):
         except Exception as e:
             await ctx.send(f"An error occurred: {e}")
 
-    @commands.Cog.listener()
-    async def on_message(self, message):
-        if message.author.bot:
-            return
+    async def forward_dm(self, context):
+        """Pipeline stage: record a DM and forward it to the bot owner."""
+        message = context.message
+        self.received_dms.append((message.author, message.content))
 
-        if isinstance(message.channel, discord.DMChannel):
-            self.received_dms.append((message.author, message.content))
-            
-            owner = (await self.bot.application_info()).owner
-            if owner:
-                embed = discord.Embed(
-                    title="New DM Received",
-                    description=message.content,
-                    color=discord.Color.purple(),
-                    timestamp=message.created_at
-                )
-                embed.set_author(name=str(message.author), icon_url=message.author.display_avatar.url)
-                embed.add_field(name="User ID", value=message.author.id)
-                embed.add_field(name="Username", value=str(message.author))
-                
-                try:
-                    await owner.send(embed=embed)
-                except discord.Forbidden:
-                    print(f"Failed to forward DM to owner: {owner.id}")
+        owner = (await self.bot.application_info()).owner
+        if owner:
+            embed = discord.Embed(
+                title="New DM Received",
+                description=message.content,
+                color=discord.Color.purple(),
+                timestamp=message.created_at
+            )
+            embed.set_author(name=str(message.author), icon_url=message.author.display_avatar.url)
+            embed.add_field(name="User ID", value=message.author.id)
+            embed.add_field(name="Username", value=str(message.author))
+
+            try:
+                await owner.send(embed=embed)
+            except discord.Forbidden:
+                print(f"Failed to forward DM to owner: {owner.id}")
 
 
     @commands.command(name='scandm', help='Lists all DMs received by the bot during the current session.')
@@ -322,6 +328,30 @@ class Misc(commands.Cog):
             embed.set_author(name=str(author), icon_url=author.display_avatar.url)
             await ctx.send(embed=embed)
 
+    @commands.command(name='pipelinestats', help='Shows how long each message pipeline stage takes.')
+    @commands.is_owner()
+    async def pipelinestats(self, ctx):
+        pipeline = self.bot.pipeline
+        embed = discord.Embed(
+            title="Message Pipeline",
+            description="Stages in the order they run, timed since startup.",
+            color=discord.Color.blue()
+        )
+        for name in pipeline.handlers:
+            timing = pipeline.timings[name]
+            embed.add_field(
+                name=name,
+                value=(
+                    f"Calls: {timing.calls}\n"
+                    f"Average: {timing.average * 1000:.2f} ms\n"
+                    f"Slowest: {timing.slowest * 1000:.2f} ms\n"
+                    f"Consumed: {timing.consumed}\n"
+                    f"Errors: {timing.errors}"
+                ),
+                inline=True
+            )
+        await ctx.send(embed=embed)
+
     @commands.command(name='countlines')
     @commands.is_owner()  # Ensures only the bot owner can use this command
     async def count_cog_lines(self, ctx):
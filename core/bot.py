@@ -10,7 +10,11 @@ from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 
 from .constants import keyword_responses
+from .pipeline import MessageContext, MessagePipeline, Stage
 from .utils import get_all_videos
+from utils.avatar_colors import DominantColorService
+from utils.keywords import KeywordResponder
+from utils.profiles import ProfileResolver
 
 # Define a custom formatter to apply GMT+7 timezone for log timestamps
 class GMT7Formatter(logging.Formatter):
@@ -60,6 +64,16 @@ class LunaBot(commands.Bot):
             owner_ids=[self.DEV_USER_ID, 521226389559443461] # owner ids
         )
         self.add_check(self.globally_block_dms)
+
+        # Shared name/avatar lookups for leaderboards
+        self.profiles = ProfileResolver(self)
+        # Avatar-derived embed colors; holds one HTTP session for the bot's lifetime
+        self.avatar_colors = DominantColorService()
+        # Built-in and per-guild keyword responses; each set is compiled into one trie regex and matched in one scan
+        self.keywords = KeywordResponder(keyword_responses)
+        # Every incoming message goes through here; cogs register their stages on load
+        self.pipeline = MessagePipeline()
+        self.pipeline.register(Stage.RESPOND, "keywords", self.respond_to_keywords, dms=True, commands=True)
         
         # Enhanced caching system
         self.video_cache = []
@@ -70,6 +84,32 @@ class LunaBot(commands.Bot):
         self.youtube_update_interval = 30  # minutes
         self.status_update_interval = 10   # minutes
 
+    async def close(self):
+        await super().close()
+        await self.avatar_colors.close()
+
+    def _strip_prefix(self, content: str):
+        """``content`` after the command prefix, or None if it has no prefix"""
+        prefixes = (self.command_prefix,) if isinstance(self.command_prefix, str) else self.command_prefix
+        for prefix in prefixes:
+            if content.startswith(prefix):
+                rest = content[len(prefix):]
+                return rest.lstrip() if self.strip_after_prefix else rest
+        return None
+
+    def is_command(self, message: discord.Message) -> bool:
+        """Whether ``message`` would invoke a command, without building a Context.
+
+        Same answer as ``(await self.get_context(message)).valid`` for the
+        static prefix this bot uses: a prefix check, then the first word
+        looked up in the (case-insensitive) command table. Listeners call
+        this on every message, so plain chat never pays for parsing.
+        """
+        rest = self._strip_prefix(message.content)
+        if not rest or rest[0].isspace():
+            return False
+        return rest.split(None, 1)[0] in self.all_commands
+
     async def on_ready(self):
         self.logger.info(f"{self.user} is connected and ready to use.")
         self.update_youtube_presence.start()
@@ -208,11 +248,23 @@ class LunaBot(commands.Bot):
     async def on_message(self, message):
         if message.author.bot:
             return  # Ignore messages sent by the bot itself
-    
-        # Check for keywords and send appropriate responses with username
-        for keyword, responses in keyword_responses.items():
-            if keyword in message.content.lower():
-                response = random.choice(responses)
-                await message.channel.send(f'{response}')
-                break  # Exit loop after sending a response
-        await self.process_commands(message)  # "Again, please don't stop working", Amiko said.
\ No newline at end of file
+
+        is_command = self.is_command(message)
+        has_prefix = is_command or self._strip_prefix(message.content) is not None
+        context = await self.pipeline.run(MessageContext(message, is_command, has_prefix), last=Stage.MODERATE)
+        if context.consumed_by is not None:
+            return
+
+        # Commands are dispatched before XP and keyword replies so they never wait on them.
+        # Unknown commands still go through so they get the "couldn't find that command" reply
+        if has_prefix:
+            await self.process_commands(message)  # "Again, please don't stop working", Amiko said.
+
+        await self.pipeline.run(context, first=Stage.SCORE)
+
+    async def respond_to_keywords(self, context):
+        # Guild keywords first, then the built-in ones; at most one response per message
+        message = context.message
+        responses = self.keywords.responses_for(context.guild_id, message.content)
+        if responses:
+            await message.channel.send(random.choice(responses))
\ No newline at end of file
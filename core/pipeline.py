@@ -0,0 +1,123 @@
+import logging
+import time
+from enum import IntEnum
+from typing import Awaitable, Callable, Dict, List, NamedTuple, Optional
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+
+class Stage(IntEnum):
+    """Where a handler runs; lower stages see every message first."""
+    FILTER = 0
+    MODERATE = 1
+    SCORE = 2
+    RESPOND = 3
+
+
+class MessageContext:
+    """What every stage needs to know about a message, worked out once."""
+
+    __slots__ = ('message', 'guild_id', 'is_command', 'has_prefix', 'consumed_by')
+
+    def __init__(self, message: discord.Message, is_command: bool = False, has_prefix: bool = False):
+        self.message = message
+        self.guild_id: Optional[int] = message.guild.id if message.guild else None
+        self.is_command = is_command  # a known command; it goes to process_commands
+        self.has_prefix = has_prefix  # starts with the prefix, known command or not
+        self.consumed_by: Optional[str] = None
+
+
+# Returns True when it has dealt with the message and later stages must not see it
+Handler = Callable[[MessageContext], Awaitable[Optional[bool]]]
+
+
+class Registration(NamedTuple):
+    stage: Stage
+    order: int
+    name: str
+    handler: Handler
+    guilds: bool
+    dms: bool
+    commands: bool
+
+    def wants(self, context: MessageContext) -> bool:
+        if context.is_command and not self.commands:
+            return False
+        return self.guilds if context.guild_id is not None else self.dms
+
+
+class StageTiming:
+    __slots__ = ('calls', 'consumed', 'errors', 'total', 'slowest')
+
+    def __init__(self):
+        self.calls = 0
+        self.consumed = 0
+        self.errors = 0
+        self.total = 0.0
+        self.slowest = 0.0
+
+    @property
+    def average(self) -> float:
+        return self.total / self.calls if self.calls else 0.0
+
+
+class MessagePipeline:
+    """The bot's single route for incoming messages.
+
+    Cogs register handlers under a stage instead of adding their own
+    ``on_message`` listeners. Handlers run one after another, by stage
+    and then in registration order, on a shared MessageContext; one that
+    returns True consumes the message and the rest are skipped, so a
+    message automod removes never earns XP or a keyword reply. By
+    default handlers only see guild messages that are not commands.
+    Time spent in each handler is kept in ``timings``.
+    """
+
+    def __init__(self):
+        self._registrations: List[Registration] = []
+        self._order = 0
+        self.timings: Dict[str, StageTiming] = {}
+
+    def register(self, stage: Stage, name: str, handler: Handler,
+                 guilds: bool = True, dms: bool = False, commands: bool = False):
+        """Add ``handler``; registering a name again replaces the old handler (e.g. on cog reload)"""
+        self.unregister(name)
+        self._order += 1
+        self._registrations.append(Registration(stage, self._order, name, handler, guilds, dms, commands))
+        self._registrations.sort()
+        self.timings.setdefault(name, StageTiming())
+
+    def unregister(self, name: str):
+        self._registrations = [r for r in self._registrations if r.name != name]
+
+    @property
+    def handlers(self) -> List[str]:
+        return [r.name for r in self._registrations]
+
+    async def run(self, context: MessageContext, first: Stage = Stage.FILTER,
+                  last: Stage = Stage.RESPOND) -> MessageContext:
+        """Run the handlers of stages ``first`` through ``last``; a consumed context runs nothing"""
+        if context.consumed_by is not None:
+            return context
+        for registration in self._registrations:
+            if not first <= registration.stage <= last or not registration.wants(context):
+                continue
+            timing = self.timings[registration.name]
+            start = time.perf_counter()
+            try:
+                consumed = await registration.handler(context)
+            except Exception:
+                timing.errors += 1
+                consumed = False
+                logger.exception(f"Message handler '{registration.name}' failed:")
+            elapsed = time.perf_counter() - start
+            timing.calls += 1
+            timing.total += elapsed
+            timing.slowest = max(timing.slowest, elapsed)
+            if consumed:
+                timing.consumed += 1
+                context.consumed_by = registration.name
+                break
+        return context
@@ -0,0 +1,92 @@
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Hashable, Iterable, List
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+BULK_DELETE_LIMIT = 100  # messages per delete_messages call
+
+
+class GuildActionQueue:
+    """Per-guild queues of pending actions, each drained by its own worker.
+
+    ``put`` never waits. A guild's worker starts with its first item,
+    hands everything queued so far to ``handler`` as one batch, and
+    exits once the queue is empty. While a batch is being applied new
+    items pile up behind it, so the busier a guild gets the larger (and
+    fewer) its batches become.
+    """
+
+    def __init__(self, handler: Callable[[Hashable, List[Any]], Awaitable[None]], max_batch: int = 500):
+        self.handler = handler
+        self.max_batch = max_batch
+        self._queues: Dict[Hashable, Deque[Any]] = {}
+        self._workers: Dict[Hashable, asyncio.Task] = {}
+
+    def pending(self, guild_id: Hashable) -> int:
+        return len(self._queues.get(guild_id, ()))
+
+    def put(self, guild_id: Hashable, item: Any):
+        self._queues.setdefault(guild_id, deque()).append(item)
+        if guild_id not in self._workers:
+            self._workers[guild_id] = asyncio.create_task(self._run(guild_id))
+
+    async def _run(self, guild_id: Hashable):
+        queue = self._queues[guild_id]
+        try:
+            while queue:
+                batch = [queue.popleft() for _ in range(min(len(queue), self.max_batch))]
+                try:
+                    await self.handler(guild_id, batch)
+                except Exception:
+                    logger.exception(f"Failed to apply {len(batch)} queued actions in guild {guild_id}:")
+        finally:
+            # Nothing can be queued between the empty check and here, there is no await in between
+            del self._workers[guild_id]
+            if not queue:
+                del self._queues[guild_id]
+
+    def close(self):
+        for worker in self._workers.values():
+            worker.cancel()
+
+
+async def bulk_delete(messages: Iterable[discord.Message]):
+    """Delete messages with as few requests as possible.
+
+    Messages are grouped by channel and removed 100 at a time with
+    ``delete_messages``; a lone message, or a bulk request Discord
+    rejects, falls back to deleting one by one.
+    """
+    by_channel: Dict[int, Dict[int, discord.Message]] = {}
+    for message in messages:
+        by_channel.setdefault(message.channel.id, {})[message.id] = message
+
+    async def delete_one(message: discord.Message):
+        try:
+            await message.delete()
+        except discord.NotFound:
+            pass
+        except discord.HTTPException as e:
+            logger.warning(f"Failed to delete message {message.id}: {e}")
+
+    async def delete_chunk(chunk: List[discord.Message]):
+        if len(chunk) == 1:
+            await delete_one(chunk[0])
+            return
+        try:
+            await chunk[0].channel.delete_messages(chunk)
+        except discord.HTTPException as e:
+            logger.warning(f"Bulk delete of {len(chunk)} messages failed, deleting individually: {e}")
+            for message in chunk:
+                await delete_one(message)
+
+    chunks = []
+    for channel_messages in by_channel.values():
+        channel_messages = list(channel_messages.values())
+        for i in range(0, len(channel_messages), BULK_DELETE_LIMIT):
+            chunks.append(channel_messages[i:i + BULK_DELETE_LIMIT])
+    await asyncio.gather(*(delete_chunk(chunk) for chunk in chunks))
@@ -0,0 +1,74 @@
+import asyncio
+import logging
+from collections import OrderedDict
+from io import BytesIO
+from typing import Optional
+
+import aiohttp
+import discord
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+
+def _average_color(data: bytes) -> int:
+    """Average an image down to one RGB pixel and return it as 0xRRGGBB"""
+    with Image.open(BytesIO(data)) as img:
+        img.draft("RGB", (1, 1))  # lets JPEG decoders downscale while decoding
+        r, g, b = img.convert("RGB").resize((1, 1)).getpixel((0, 0))
+    return (r << 16) | (g << 8) | b
+
+
+class DominantColorService:
+    """Embed colors taken from avatars, memoized by avatar hash.
+
+    Avatars are requested at Discord's smallest size, decoded in the
+    default executor and downloaded over one long-lived aiohttp session.
+    Failed lookups fall back to blurple and are not cached.
+    """
+
+    def __init__(self, size: int = 16, max_entries: int = 4096, timeout: float = 10):
+        self.size = size
+        self.max_entries = max_entries
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self._colors: 'OrderedDict[str, int]' = OrderedDict()
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(timeout=self.timeout)
+        return self._session
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+    def _small_url(self, asset: discord.Asset) -> str:
+        try:
+            # Animated avatars come back as their first frame
+            return asset.with_format("png").with_size(self.size).url
+        except ValueError:
+            return asset.url
+
+    async def get_color(self, asset: discord.Asset) -> discord.Color:
+        value = self._colors.get(asset.key)
+        if value is not None:
+            self._colors.move_to_end(asset.key)
+            return discord.Color(value)
+
+        try:
+            async with self.session.get(self._small_url(asset)) as response:
+                if response.status != 200:
+                    logger.error(f"Failed to fetch image: Status {response.status}")
+                    return discord.Color.blurple()
+                data = await response.read()
+            value = await asyncio.get_running_loop().run_in_executor(None, _average_color, data)
+        except Exception:
+            logger.exception("Exception occurred while fetching dominant color:")
+            return discord.Color.blurple()
+
+        self._colors[asset.key] = value
+        while len(self._colors) > self.max_entries:
+            self._colors.popitem(last=False)
+        return discord.Color(value)
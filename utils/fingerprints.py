@@ -0,0 +1,114 @@
+import random
+import re
+import time
+from collections import OrderedDict, deque
+from typing import Deque, Hashable, List, Optional, Tuple
+
+MENTION_REGEX = re.compile(r'<(?:@[!&]?|#)\d+>')
+PUNCTUATION_REGEX = re.compile(r'[^\w\s]+')
+
+# MinHash over word 3-shingles, split into LSH bands. Two messages share a
+# band with probability 1 - (1 - J^ROWS)^BANDS for Jaccard similarity J:
+# about 0.88 at J=0.8 and 0.03 at J=0.3.
+SHINGLE_SIZE = 3
+MAX_SHINGLES = 64
+BANDS = 4
+ROWS = 4
+_PRIME = (1 << 61) - 1
+_rng = random.Random(0x5eed)
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(_PRIME)) for _ in range(BANDS * ROWS)]
+
+# Greetings and one-liners ("good morning everyone") are posted by many people
+# at once in normal chat; only messages with this much content are tracked
+MIN_LENGTH = 30
+MIN_TOKENS = 5
+
+
+def normalize(content: str) -> List[str]:
+    """Tokens that survive case, punctuation, spacing and mention changes"""
+    content = MENTION_REGEX.sub(' ', content)
+    return PUNCTUATION_REGEX.sub('', content.casefold()).split()
+
+
+def fingerprints(content: str, min_length: int = MIN_LENGTH, min_tokens: int = MIN_TOKENS) -> List[Hashable]:
+    """Keys under which near-identical messages collide.
+
+    The whole normalized text gives one exact key; messages long enough
+    to shingle also get one key per LSH band. Short messages get no keys,
+    so they never count towards a raid. Work is capped at
+    ``MAX_SHINGLES`` shingles, so the cost doesn't grow with length.
+    """
+    tokens = normalize(content)
+    text = ' '.join(tokens)
+    if len(tokens) < min_tokens or len(text) < min_length:
+        return []
+    keys: List[Hashable] = [hash(text)]
+
+    if len(tokens) > SHINGLE_SIZE:
+        shingles = {
+            hash(' '.join(tokens[i:i + SHINGLE_SIZE]))
+            for i in range(min(len(tokens) - SHINGLE_SIZE + 1, MAX_SHINGLES))
+        }
+        signature = [min((a * h + b) % _PRIME for h in shingles) for a, b in _PERMUTATIONS]
+        for band in range(BANDS):
+            keys.append((band, *signature[band * ROWS:(band + 1) * ROWS]))
+    return keys
+
+
+class DuplicateDetector:
+    """Spot the same content posted by many users, or by one user in many channels.
+
+    Every fingerprint of a message is recorded per guild together with
+    its author and channel. A key keeps at most ``max_posts`` recent
+    posts and only ``max_keys`` keys are kept overall, evicting the one
+    that has been quiet longest, so each message costs a bounded amount
+    of work and memory stays flat however busy a raid gets.
+    """
+
+    def __init__(self, window: float = 15, max_posts: int = 32, max_keys: int = 20000):
+        self.window = window
+        self.max_posts = max_posts
+        self.max_keys = max_keys
+        self._posts: 'OrderedDict[Tuple[int, Hashable], Deque[Tuple[float, int, int]]]' = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._posts)
+
+    def check(self, guild_id: int, user_id: int, channel_id: int, content: str,
+              now: Optional[float] = None) -> Tuple[int, int]:
+        """Record a message and return the most distinct users that posted matching
+        content within the window, and the most distinct channels this user posted
+        it in, this message included"""
+        now = time.monotonic() if now is None else now
+        cutoff = now - self.window
+        users = channels = 0
+
+        for fingerprint in fingerprints(content):
+            key = (guild_id, fingerprint)
+            posts = self._posts.get(key)
+            if posts is None:
+                posts = self._posts[key] = deque(maxlen=self.max_posts)
+                while len(self._posts) > self.max_keys:
+                    self._posts.popitem(last=False)
+            else:
+                self._posts.move_to_end(key)
+
+            posts.append((now, user_id, channel_id))
+            while posts[0][0] < cutoff:
+                posts.popleft()
+            users = max(users, len({post[1] for post in posts}))
+            channels = max(channels, len({post[2] for post in posts if post[1] == user_id}))
+        return users, channels
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        """Forget fingerprints not seen within the window; returns how many"""
+        now = time.monotonic() if now is None else now
+        cutoff = now - self.window
+        removed = 0
+        while self._posts:
+            key, posts = next(iter(self._posts.items()))
+            if posts[-1][0] >= cutoff:
+                break
+            del self._posts[key]
+            removed += 1
+        return removed
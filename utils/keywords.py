@@ -0,0 +1,119 @@
+import json
+import logging
+import os
+import re
+from typing import Dict, Iterable, List, Mapping, Optional
+
+from utils.word_filter import trie_pattern
+
+logger = logging.getLogger(__name__)
+
+
+class KeywordMatcher:
+    """Find the highest-priority keyword contained anywhere in a text.
+
+    Keywords are compiled into one prefix-trie regex wrapped in a
+    lookahead, so a single scan reports the longest keyword starting at
+    every position. Keywords that are prefixes of that one match there
+    too, so each keyword remembers the best priority along its own
+    prefix chain; the answer is the minimum over the scan and no
+    per-keyword search is ever made.
+    """
+
+    def __init__(self, keywords: Iterable[str]):
+        # Priority is list order; repeats (after lowercasing) keep their first slot
+        self.keywords: List[str] = list(dict.fromkeys(k.lower() for k in keywords if k))
+        priority = {keyword: i for i, keyword in enumerate(self.keywords)}
+        self._best: Dict[str, int] = {}
+        for keyword in self.keywords:
+            self._best[keyword] = min(
+                priority[keyword[:end]] for end in range(1, len(keyword) + 1) if keyword[:end] in priority
+            )
+        self.pattern = re.compile(f'(?=({trie_pattern(self.keywords)}))') if self.keywords else None
+
+    def __len__(self) -> int:
+        return len(self.keywords)
+
+    def match(self, text: str) -> Optional[str]:
+        """The highest-priority keyword in ``text`` (already lowercased), or None"""
+        if self.pattern is None:
+            return None
+        best = None
+        for found in self.pattern.finditer(text):
+            rank = self._best[found.group(1)]
+            if best is None or rank < best:
+                best = rank
+                if rank == 0:
+                    break
+        return None if best is None else self.keywords[best]
+
+
+class KeywordResponder:
+    """Built-in keyword responses plus custom sets per guild.
+
+    The built-in table is compiled once. Each guild's custom keywords
+    are stored in a JSON file and get their own matcher, rebuilt only
+    when that guild's set changes, and not before its next message, so a
+    run of edits costs one compile. Custom keywords are checked first.
+    """
+
+    def __init__(self, builtin: Mapping[str, List[str]], path: str = "cogs/data/custom_keywords.json"):
+        self.path = path
+        self.builtin: Dict[str, List[str]] = {}
+        for keyword, responses in builtin.items():
+            self.builtin.setdefault(keyword.lower(), responses)
+        self._builtin_matcher = KeywordMatcher(builtin)
+        self.custom: Dict[str, Dict[str, List[str]]] = {}
+        self._matchers: Dict[str, KeywordMatcher] = {}
+        self.load()
+
+    def load(self):
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self.custom = json.load(f)
+        except Exception:
+            logger.exception("Failed to load custom keywords:")
+            self.custom = {}
+        self._matchers.clear()
+
+    def save(self):
+        try:
+            with open(self.path, "w", encoding="utf-8") as f:
+                json.dump(self.custom, f, indent=4, ensure_ascii=False)
+        except Exception:
+            logger.exception("Failed to save custom keywords:")
+
+    def get_guild(self, guild_id: int) -> Dict[str, List[str]]:
+        return self.custom.get(str(guild_id), {})
+
+    def set_guild(self, guild_id: int, keywords: Dict[str, List[str]]):
+        """Replace a guild's custom keywords and save; only its matcher is invalidated"""
+        guild_id = str(guild_id)
+        if keywords:
+            self.custom[guild_id] = {keyword.lower(): responses for keyword, responses in keywords.items()}
+        else:
+            self.custom.pop(guild_id, None)
+        self._matchers.pop(guild_id, None)
+        self.save()
+
+    def _guild_matcher(self, guild_id: str) -> Optional[KeywordMatcher]:
+        keywords = self.custom.get(guild_id)
+        if not keywords:
+            return None
+        matcher = self._matchers.get(guild_id)
+        if matcher is None:
+            matcher = self._matchers[guild_id] = KeywordMatcher(keywords)
+        return matcher
+
+    def responses_for(self, guild_id: Optional[int], content: str) -> Optional[List[str]]:
+        """Responses for the best keyword in ``content``, or None"""
+        text = content.lower()
+        if guild_id is not None:
+            matcher = self._guild_matcher(str(guild_id))
+            if matcher is not None:
+                keyword = matcher.match(text)
+                if keyword is not None:
+                    return self.custom[str(guild_id)][keyword]
+        keyword = self._builtin_matcher.match(text)
+        return None if keyword is None else self.builtin[keyword]
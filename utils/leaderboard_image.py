@@ -0,0 +1,125 @@
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from io import BytesIO
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+
+from PIL import Image, ImageDraw, ImageFont
+
+logger = logging.getLogger(__name__)
+
+FONT_PATH = "assets/fonts/segoe-ui-semibold.ttf"
+AVATAR_SIZE = 50
+
+# (rank, name, level, xp, avatar_key)
+Row = Tuple[int, str, int, int, Optional[str]]
+
+
+@lru_cache(maxsize=8)
+def load_font(path: str, size: int) -> ImageFont.FreeTypeFont:
+    return ImageFont.truetype(path, size)
+
+
+class LeaderboardRenderer:
+    """Draws leaderboard PNGs in a worker thread.
+
+    Decoded 50x50 RGBA avatars are kept in an LRU keyed by avatar hash,
+    so an avatar is downloaded and decoded once until the user changes
+    it. Finished PNGs are kept per key (e.g. guild and page) together
+    with the rows they were drawn from and reused while those rows are
+    unchanged.
+    """
+
+    def __init__(self, font_path: str = FONT_PATH, max_avatars: int = 512, max_images: int = 64, workers: int = 2):
+        self.font_path = font_path
+        self.max_avatars = max_avatars
+        self.max_images = max_images
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="leaderboard")
+        self._avatars: 'OrderedDict[str, Image.Image]' = OrderedDict()
+        self._avatar_lock = threading.Lock()
+        self._images: 'OrderedDict[Hashable, Tuple[Tuple[Row, ...], bytes]]' = OrderedDict()
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def get_cached(self, key: Hashable, rows: Iterable[Row]) -> Optional[bytes]:
+        """Return the PNG last rendered for ``key`` if it was drawn from the same rows"""
+        entry = self._images.get(key)
+        if entry is None or entry[0] != tuple(rows):
+            return None
+        self._images.move_to_end(key)
+        return entry[1]
+
+    def has_avatar(self, avatar_key: Optional[str]) -> bool:
+        with self._avatar_lock:
+            return avatar_key in self._avatars
+
+    def invalidate(self, key: Hashable):
+        self._images.pop(key, None)
+
+    async def render(self, key: Hashable, rows: List[Row], avatar_bytes: Dict[str, bytes]) -> bytes:
+        """Compose the image off the event loop and cache it under ``key``.
+
+        ``avatar_bytes`` maps avatar keys to downloaded images for avatars
+        not yet in the thumbnail cache.
+        """
+        rows = tuple(rows)
+        loop = asyncio.get_running_loop()
+        png = await loop.run_in_executor(self._executor, self._render, rows, avatar_bytes)
+        self._images[key] = (rows, png)
+        self._images.move_to_end(key)
+        while len(self._images) > self.max_images:
+            self._images.popitem(last=False)
+        return png
+
+    def _thumbnail(self, avatar_key: Optional[str], avatar_bytes: Dict[str, bytes]) -> Optional[Image.Image]:
+        if avatar_key is None:
+            return None
+        with self._avatar_lock:
+            thumbnail = self._avatars.get(avatar_key)
+            if thumbnail is not None:
+                self._avatars.move_to_end(avatar_key)
+                return thumbnail
+
+        data = avatar_bytes.get(avatar_key)
+        if data is None:
+            return None
+        try:
+            thumbnail = Image.open(BytesIO(data)).convert("RGBA").resize((AVATAR_SIZE, AVATAR_SIZE))
+        except Exception as e:
+            logger.warning(f"Failed to decode avatar {avatar_key}: {e}")
+            return None
+
+        with self._avatar_lock:
+            self._avatars[avatar_key] = thumbnail
+            while len(self._avatars) > self.max_avatars:
+                self._avatars.popitem(last=False)
+        return thumbnail
+
+    def _render(self, rows: Tuple[Row, ...], avatar_bytes: Dict[str, bytes]) -> bytes:
+        width, height = 900, 100 + len(rows) * 80
+        image = Image.new("RGB", (width, height), color=(30, 30, 30))
+        draw = ImageDraw.Draw(image)
+        font = load_font(self.font_path, 30)
+
+        y_offset = 40
+        for rank, name, level, xp, avatar_key in rows:
+            thumbnail = self._thumbnail(avatar_key, avatar_bytes)
+            if thumbnail is not None:
+                # The RGBA thumbnail doubles as its own paste mask
+                image.paste(thumbnail, (50, y_offset), thumbnail)
+
+            draw.text(
+                (120, y_offset + 10),
+                f"{rank}. {name} - Level {level} ({xp} XP)",
+                fill=(255, 255, 255),
+                font=font
+            )
+            y_offset += 80
+
+        with BytesIO() as buffer:
+            image.save(buffer, 'PNG')
+            return buffer.getvalue()
@@ -0,0 +1,72 @@
+"""Level/XP math shared by the level database and the LevelSystem cog.
+
+A user at ``level`` needs ``xp_for_level(level)`` XP to advance, and the
+stored ``xp`` is progress inside the current level. Cumulative thresholds
+are kept in an array so converting between (level, xp) and total XP is a
+bisect instead of a level-by-level walk.
+"""
+from array import array
+from bisect import bisect_right
+from typing import Tuple
+
+__all__ = (
+    "xp_for_level",
+    "total_xp_for_level",
+    "level_for_total_xp",
+    "xp_to_next",
+    "apply_xp",
+)
+
+_INITIAL_LEVELS = 1000
+
+# _thresholds[i] is the total XP at which level i + 1 starts
+_thresholds = array('q', [0])
+
+
+def xp_for_level(level: int) -> int:
+    """XP needed to go from ``level`` to ``level + 1``."""
+    return int(100 * (level ** 1.5))
+
+
+def _grow_to_level(level: int):
+    while len(_thresholds) < level:
+        current = len(_thresholds)
+        _thresholds.append(_thresholds[-1] + xp_for_level(current))
+
+
+def _grow_to_total(total_xp: int):
+    while _thresholds[-1] <= total_xp:
+        _grow_to_level(len(_thresholds) * 2)
+
+
+def total_xp_for_level(level: int) -> int:
+    """Total XP at which ``level`` starts."""
+    if level > len(_thresholds):
+        _grow_to_level(level)
+    return _thresholds[level - 1]
+
+
+def level_for_total_xp(total_xp: int) -> Tuple[int, int]:
+    """Return (level, xp into that level) for a total XP amount."""
+    total_xp = max(0, total_xp)
+    if total_xp >= _thresholds[-1]:
+        _grow_to_total(total_xp)
+    level = bisect_right(_thresholds, total_xp)
+    return level, total_xp - _thresholds[level - 1]
+
+
+def xp_to_next(level: int, xp: int) -> int:
+    """XP still missing before ``level`` rolls over."""
+    return xp_for_level(level) - xp
+
+
+def apply_xp(level: int, xp: int, amount: int) -> Tuple[bool, int, int]:
+    """Add ``amount`` XP to (level, xp) and return (leveled_up, new_level, new_xp).
+
+    Negative amounts can drop a user back down, but never below level 1 / 0 XP.
+    """
+    new_level, new_xp = level_for_total_xp(total_xp_for_level(level) + xp + amount)
+    return new_level > level, new_level, new_xp
+
+
+_grow_to_level(_INITIAL_LEVELS)
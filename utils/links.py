@@ -0,0 +1,175 @@
+import logging
+import os
+import re
+import unicodedata
+from typing import Iterable, List, NamedTuple, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# Hosts with or without a scheme; \w also takes unicode so lookalike IDNs are caught
+URL_REGEX = re.compile(r'(?<![\w.@-])(?:https?://)?((?:[\w-]+\.)+[\w-]{2,})\.?(?::\d+)?(/[^\s<>]*)?', re.IGNORECASE)
+MAX_LINKS = 20  # per message
+MAX_SUFFIXES = 5  # a.b.c.example.com is looked up as at most this many parents
+
+INVITE_HOSTS = frozenset({'discord.gg'})
+INVITE_PATH_HOSTS = frozenset({'discord.com', 'discordapp.com'})
+
+# Official domains; anything that folds to the same skeleton is a lookalike
+DEFAULT_ALLOWED = (
+    'discord.com', 'discord.gg', 'discord.gift', 'discord.media', 'discordapp.com', 'discordapp.net',
+    'discordstatus.com', 'discord.dev', 'discord.new', 'discordmerch.com',
+    'steamcommunity.com', 'steampowered.com', 'steamstatic.com',
+    # Libraries people name in chat, which read as hosts
+    'discord.py', 'discord.js', 'discord.js.org', 'discordjs.guide', 'discordpy.readthedocs.io',
+)
+# Names scam hosts dress up in ("mydlscord.com", "dlscord-gift.xyz"); a host
+# whose folded labels contain one, outside the allowlist, is a lookalike
+DEFAULT_BRANDS = ('discord', 'steamcommunity', 'steampowered')
+DEFAULT_BLOCKED = tuple(
+    f'{name}.{tld}'
+    for name in ('dlscord', 'discorde', 'steamcommunlty', 'dlscordgift', 'discordgift', 'steamgift')
+    for tld in ('com', 'net', 'org', 'gift', 'ru', 'gg', 'app')
+)
+
+# Letters that render like latin ones (Cyrillic, Greek, ...), plus digit and
+# letter swaps scam domains lean on. Folding is only used for comparing, never shown.
+_CONFUSABLES = str.maketrans({
+    'а': 'a', 'ɑ': 'a', 'α': 'a',
+    'Ь': 'b', 'в': 'b',
+    'с': 'c', 'ϲ': 'c',
+    'ԁ': 'd',
+    'е': 'e', 'ё': 'e', 'є': 'e', 'ε': 'e', '3': 'e',
+    'ɡ': 'g',
+    'һ': 'h',
+    'і': 'i', 'ї': 'i', 'ι': 'i', 'ı': 'i', 'l': 'i', 'ӏ': 'i', '1': 'i',
+    'ј': 'j',
+    'к': 'k', 'κ': 'k',
+    'м': 'm',
+    'п': 'n', 'η': 'n',
+    'о': 'o', 'ο': 'o', 'σ': 'o', '0': 'o',
+    'р': 'p', 'ρ': 'p',
+    'ԛ': 'q',
+    'г': 'r',
+    'ѕ': 's', '5': 's',
+    'т': 't', 'τ': 't', '7': 't',
+    'υ': 'u', 'ս': 'u',
+    'ν': 'v', 'ѵ': 'v',
+    'ԝ': 'w', 'ω': 'w',
+    'х': 'x', 'χ': 'x',
+    'у': 'y', 'ү': 'y',
+    'ᴢ': 'z',
+    '-': None, '_': None,
+})
+
+
+class Link(NamedTuple):
+    host: str  # lowercase, IDNA-decoded, without "www." or a trailing dot
+    path: str
+
+    @property
+    def is_invite(self) -> bool:
+        if self.host in INVITE_HOSTS:
+            return len(self.path) > 1
+        return self.host in INVITE_PATH_HOSTS and self.path.startswith('/invite/')
+
+
+def normalize_host(host: str) -> str:
+    host = host.lower().rstrip('.')
+    if 'xn--' in host:
+        try:
+            host = host.encode('ascii').decode('idna')
+        except UnicodeError:
+            pass
+    if host.startswith('www.'):
+        host = host[4:]
+    return host
+
+
+def skeleton(host: str) -> str:
+    """Fold a host so lookalikes compare equal: dlscord.com, dіscord.com and disc0rd.com all give discord.com"""
+    folded = unicodedata.normalize('NFKC', host).casefold().translate(_CONFUSABLES)
+    return folded.replace('rn', 'm').replace('vv', 'w')
+
+
+def extract_links(content: str) -> List[Link]:
+    if '.' not in content:
+        return []
+    links = []
+    # A link never spans whitespace, so only dotted words are worth a regex scan
+    for word in content.split():
+        if '.' not in word:
+            continue
+        for match in URL_REGEX.finditer(word):
+            links.append(Link(normalize_host(match.group(1)), match.group(2) or ''))
+            if len(links) >= MAX_LINKS:
+                return links
+    return links
+
+
+def _suffixes(host: str) -> List[str]:
+    """The host and its parent domains, longest first, down to two labels"""
+    labels = host.split('.')
+    start = max(len(labels) - 1 - MAX_SUFFIXES, 0)
+    return ['.'.join(labels[i:]) for i in range(start, len(labels) - 1)]
+
+
+def read_domain_list(path: str) -> List[str]:
+    """Domains from a text file: one per line, '#' comments, hosts-file lines allowed"""
+    domains = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.split('#', 1)[0].split()
+            if line:
+                # "0.0.0.0 bad.example" in hosts files; a bare domain otherwise
+                domains.append(line[-1])
+    return domains
+
+
+class LinkFilter:
+    """Classify hosts against an allowlist and a blocklist held in hash sets.
+
+    A host is checked along with its parent domains, so subdomains of a
+    listed domain are covered; every lookup is a set membership test,
+    which keeps the cost per link flat no matter how long the lists are.
+    A host whose skeleton equals an allowed domain's without being under
+    that domain is treated as an impersonation of it, as is one with a
+    brand name inside any folded label but the TLD. Blocklist entries
+    match exactly: folding them too would make the blocked "paypa1.com"
+    catch the real "paypal.com".
+    """
+
+    def __init__(self, allowed: Iterable[str] = DEFAULT_ALLOWED, blocked: Iterable[str] = DEFAULT_BLOCKED,
+                 brands: Iterable[str] = DEFAULT_BRANDS):
+        self.allowed: Set[str] = set()
+        self.blocked: Set[str] = set()
+        self._allowed_skeletons: Set[str] = set()
+        self.brands = tuple(skeleton(brand) for brand in brands)
+        self.allow(allowed)
+        self.block(blocked)
+
+    def allow(self, domains: Iterable[str]):
+        for domain in domains:
+            domain = normalize_host(domain)
+            self.allowed.add(domain)
+            self._allowed_skeletons.add(skeleton(domain))
+
+    def block(self, domains: Iterable[str]):
+        self.blocked.update(normalize_host(domain) for domain in domains)
+
+    def load(self, blocklist_path: Optional[str] = None, allowlist_path: Optional[str] = None):
+        """Add domains from list files; missing files are skipped"""
+        for path, add in ((allowlist_path, self.allow), (blocklist_path, self.block)):
+            if path and os.path.exists(path):
+                try:
+                    add(read_domain_list(path))
+                except OSError as e:
+                    logger.error(f"Failed to read domain list {path}: {e}")
+
+    def is_blocked(self, host: str) -> bool:
+        suffixes = _suffixes(host)
+        if any(suffix in self.allowed for suffix in suffixes):
+            return False
+        if any(suffix in self.blocked or skeleton(suffix) in self._allowed_skeletons for suffix in suffixes):
+            return True
+        labels = skeleton(host).split('.')[:-1]
+        return any(brand in label for label in labels for brand in self.brands)
@@ -0,0 +1,118 @@
+import operator
+import re
+import string
+from collections import Counter
+from typing import Callable, NamedTuple
+
+CUSTOM_EMOJI_REGEX = re.compile(r'<a?:[a-zA-Z0-9_]+:\d+>')
+UNICODE_EMOJI_REGEX = re.compile(r'[\U0001F300-\U0001F9FF\u2600-\u26FF\u2700-\u27BF]')
+_ASCII_UPPERCASE = string.ascii_uppercase.encode('ascii')
+
+
+def count_caps(content: str) -> int:
+    if content.isascii():
+        # Deleting A-Z in C is far cheaper than calling isupper per character
+        data = content.encode('ascii')
+        return len(data) - len(data.translate(None, _ASCII_UPPERCASE))
+    if content.islower():
+        # No capital anywhere, found by one C scan
+        return 0
+    return sum(map(str.isupper, content))
+
+
+def count_emojis(content: str) -> int:
+    """Custom and unicode emojis, skipping whichever scan can't match"""
+    count = len(CUSTOM_EMOJI_REGEX.findall(content)) if '<' in content else 0
+    if not content.isascii():
+        count += len(UNICODE_EMOJI_REGEX.findall(content))
+    return count
+
+
+def longest_run(content: str) -> int:
+    """Length of the longest run of one repeated character.
+
+    XORs the text with itself shifted by one character as big integers,
+    so equal neighbours become zero units, then bisects for the longest
+    block of zeros with substring searches. Everything per character runs
+    in C; a Python loop over 2000 characters costs about ten times more.
+    """
+    if len(content) < 2:
+        return len(content)
+    if content.isascii():
+        data, width = content.encode('ascii'), 1
+    else:
+        data, width = content.encode('utf-32-le'), 4
+    diff = int.from_bytes(data[:-width], 'little') ^ int.from_bytes(data[width:], 'little')
+    if width == 4:
+        # Fold each 4-byte unit into its low byte, then keep only those bytes
+        diff |= diff >> 8
+        diff |= diff >> 16
+    flags = diff.to_bytes(len(data) - width, 'little')[::width]
+
+    low, high = 0, len(flags)
+    while low < high:
+        mid = (low + high + 1) // 2
+        if b'\x00' * mid in flags:
+            low = mid
+        else:
+            high = mid - 1
+    return low + 1
+
+
+class MessageFeatures:
+    """Everything the threshold rules look at, each measured at most once per message.
+
+    Features are measured on first read, so a message that breaks an
+    early rule, or a guild with some rules off, never pays for the rest.
+    """
+
+    __slots__ = ('content', 'length', 'caps', 'emojis', 'newlines', 'longest_run', 'words', 'top_word_count')
+
+    def __init__(self, content: str):
+        self.content = content
+        self.length = len(content)
+
+    def __getattr__(self, name: str):
+        # Only reached for slots not filled yet
+        if name == 'caps':
+            self.caps = count_caps(self.content)
+        elif name == 'emojis':
+            self.emojis = count_emojis(self.content)
+        elif name == 'newlines':
+            self.newlines = self.content.count('\n')
+        elif name == 'longest_run':
+            self.longest_run = longest_run(self.content)
+        elif name in ('words', 'top_word_count'):
+            words = self.content.split()
+            self.words = len(words)
+            # Only the repeated-words check reads this, and it ignores messages under 6 words
+            self.top_word_count = max(Counter(words).values()) if len(words) > 5 else 0
+        else:
+            raise AttributeError(name)
+        return object.__getattribute__(self, name)
+
+    @property
+    def caps_percentage(self) -> float:
+        """Share of capital letters; 0 for messages of 10 characters or fewer"""
+        return self.caps * 100 / self.length if self.length > 10 else 0
+
+    @property
+    def repeated_words(self) -> int:
+        """Count of the most common word when it is over half of a 6+ word message, else 0"""
+        if self.words > 5 and self.top_word_count * 2 > self.words:
+            return self.top_word_count
+        return 0
+
+
+class ThresholdRule(NamedTuple):
+    """A rule that fires when a feature passes a per-guild threshold."""
+    setting: str  # feature toggle in the guild settings
+    feature: str  # MessageFeatures attribute
+    threshold_key: str  # guild settings key, set through "threshold set"
+    default: float
+    violation: str
+    message: str  # formatted with the author's mention
+    compare: Callable[[float, float], bool] = operator.gt
+
+    def check(self, features: MessageFeatures, settings: dict) -> bool:
+        return self.compare(getattr(features, self.feature), settings.get(self.threshold_key, self.default))
@@ -0,0 +1,126 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Tuple
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+
+class Profile:
+    """The parts of a user a leaderboard needs to render a row."""
+
+    __slots__ = ('id', 'name', 'avatar')
+
+    def __init__(self, id: int, name: str, avatar: Optional[discord.Asset]):
+        self.id = id
+        self.name = name
+        self.avatar = avatar
+
+    @property
+    def avatar_key(self) -> Optional[str]:
+        """Stable identifier of the avatar image; changes whenever the user changes avatar"""
+        return self.avatar.key if self.avatar is not None else None
+
+    @classmethod
+    def from_user(cls, user: discord.abc.User) -> 'Profile':
+        return cls(user.id, user.name, user.display_avatar)
+
+
+class ProfileResolver:
+    """Resolve user ids to names and avatars with as few REST calls as possible.
+
+    Lookups try the gateway cache, then a TTL cache of earlier fetches,
+    and only then ``fetch_user``. Misses are fetched concurrently behind a
+    semaphore, and a user already being fetched is awaited instead of
+    fetched twice. Users that no longer exist are cached as "Unknown User".
+    """
+
+    def __init__(self, bot: discord.Client, ttl: float = 3600, max_entries: int = 5000, concurrency: int = 5):
+        self.bot = bot
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._cache: 'OrderedDict[int, Tuple[float, Profile]]' = OrderedDict()
+        self._pending: Dict[int, asyncio.Future] = {}
+
+    def _remember(self, profile: Profile):
+        self._cache[profile.id] = (time.monotonic() + self.ttl, profile)
+        self._cache.move_to_end(profile.id)
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+
+    def get_cached(self, user_id: int) -> Optional[Profile]:
+        """Return a profile without any network access, or None"""
+        user = self.bot.get_user(user_id)
+        if user is not None:
+            profile = Profile.from_user(user)
+            self._remember(profile)
+            return profile
+
+        entry = self._cache.get(user_id)
+        if entry is None:
+            return None
+        expires, profile = entry
+        if expires < time.monotonic():
+            del self._cache[user_id]
+            return None
+        self._cache.move_to_end(user_id)
+        return profile
+
+    async def _fetch(self, user_id: int) -> Optional[Profile]:
+        async with self._semaphore:
+            try:
+                profile = Profile.from_user(await self.bot.fetch_user(user_id))
+            except discord.NotFound:
+                profile = Profile(user_id, "Unknown User", None)
+            except discord.HTTPException as e:
+                logger.warning(f"Failed to fetch user {user_id}: {e}")
+                return None
+        self._remember(profile)
+        return profile
+
+    async def _fetch_shared(self, user_id: int) -> Optional[Profile]:
+        task = self._pending.get(user_id)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch(user_id))
+            self._pending[user_id] = task
+            task.add_done_callback(lambda _: self._pending.pop(user_id, None))
+        # Shielded so one cancelled caller doesn't cancel the fetch for the others
+        return await asyncio.shield(task)
+
+    async def resolve(self, user_id: int) -> Optional[Profile]:
+        return self.get_cached(user_id) or await self._fetch_shared(user_id)
+
+    async def resolve_many(self, user_ids: Iterable[int]) -> Dict[int, Profile]:
+        """Resolve every id, fetching all cache misses in one concurrent round"""
+        profiles: Dict[int, Profile] = {}
+        missing = []
+        for user_id in dict.fromkeys(user_ids):
+            profile = self.get_cached(user_id)
+            if profile is not None:
+                profiles[user_id] = profile
+            else:
+                missing.append(user_id)
+
+        if missing:
+            fetched = await asyncio.gather(*(self._fetch_shared(user_id) for user_id in missing))
+            for user_id, profile in zip(missing, fetched):
+                if profile is not None:
+                    profiles[user_id] = profile
+        return profiles
+
+    async def read_avatars(self, profiles: Iterable[Profile], size: int = 64) -> Dict[int, bytes]:
+        """Download avatars concurrently, sharing the fetch semaphore"""
+        async def read(profile: Profile) -> Tuple[int, Optional[bytes]]:
+            async with self._semaphore:
+                try:
+                    return profile.id, await profile.avatar.with_size(size).read()
+                except (discord.HTTPException, ValueError) as e:
+                    logger.warning(f"Failed to read avatar for {profile.id}: {e}")
+                    return profile.id, None
+
+        results = await asyncio.gather(*(read(profile) for profile in profiles if profile.avatar is not None))
+        return {user_id: data for user_id, data in results if data is not None}
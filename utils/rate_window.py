@@ -0,0 +1,60 @@
+import time
+from collections import OrderedDict, deque
+from typing import Deque, Hashable, Optional
+
+
+class SlidingWindowCounter:
+    """Events per key within a trailing time window.
+
+    Each key holds a deque of event times; ``hit`` appends one and drops
+    the expired ones from the left, so an update costs O(1) amortized.
+    Keys are kept in order of their latest event, which lets ``sweep``
+    drop every idle key by only looking at the oldest ones, and caps
+    memory at ``max_keys`` by evicting the key that has been quiet the
+    longest.
+    """
+
+    def __init__(self, window: float, max_keys: int = 50000):
+        self.window = window
+        self.max_keys = max_keys
+        # Longest window any caller has asked for; nothing younger is swept
+        self._horizon = window
+        self._events: 'OrderedDict[Hashable, Deque[float]]' = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+    def hit(self, key: Hashable, window: Optional[float] = None, now: Optional[float] = None) -> int:
+        """Record an event for ``key`` and return how many fall inside the window"""
+        now = time.monotonic() if now is None else now
+        if window is None:
+            window = self.window
+        elif window > self._horizon:
+            self._horizon = window
+
+        events = self._events.get(key)
+        if events is None:
+            events = self._events[key] = deque()
+            while len(self._events) > self.max_keys:
+                self._events.popitem(last=False)
+        else:
+            self._events.move_to_end(key)
+
+        events.append(now)
+        cutoff = now - window
+        while events[0] < cutoff:
+            events.popleft()
+        return len(events)
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        """Forget keys whose latest event is older than every window; returns how many"""
+        now = time.monotonic() if now is None else now
+        cutoff = now - self._horizon
+        removed = 0
+        while self._events:
+            key, events = next(iter(self._events.items()))
+            if events[-1] >= cutoff:
+                break
+            del self._events[key]
+            removed += 1
+        return removed
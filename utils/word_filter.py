@@ -0,0 +1,64 @@
+import re
+from typing import Dict, Iterable, Optional, Pattern
+
+
+def trie_pattern(words: Iterable[str]) -> str:
+    """Regex source for ``words`` with shared prefixes factored out.
+
+    A flat ``a|b|c`` makes the engine try every word at every position;
+    nesting the alternation by prefix lets it drop whole branches after
+    one character, so the cost grows with word length rather than count.
+    """
+    trie: Dict[str, dict] = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = {}  # end-of-word marker
+
+    def build(node: Dict[str, dict]) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        optional = '' in node
+        if len(branches) == 1 and not optional:
+            return branches[0]
+        group = '(?:' + '|'.join(branches) + ')'
+        return group + '?' if optional else group
+
+    return build(trie)
+
+
+class WordMatcher:
+    """A word filter compiled into one regex.
+
+    Matches exactly what searching ``\\bword\\b`` for each word would, but
+    the message is scanned once no matter how many words are listed.
+    Rebuild it with ``update`` when the list changes; matching itself
+    never compiles anything.
+    """
+
+    def __init__(self, words: Iterable[str] = ()):
+        self.words: frozenset = frozenset()
+        self.pattern: Optional[Pattern[str]] = None
+        self.update(words)
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def update(self, words: Iterable[str]):
+        words = frozenset(word.lower() for word in words if word)
+        if words == self.words and (self.pattern is not None or not words):
+            return
+        self.words = words
+        if words:
+            self.pattern = re.compile(rf'\b(?:{trie_pattern(words)})\b', re.IGNORECASE)
+        else:
+            self.pattern = None
+
+    def search(self, content: str) -> Optional[str]:
+        """The first filtered word found in ``content``, or None"""
+        if self.pattern is None:
+            return None
+        match = self.pattern.search(content)
+        return match.group(0) if match else None